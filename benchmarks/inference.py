@@ -0,0 +1,48 @@
+"""Micro-benchmark: per-step ML inference latency, model.predict vs the traced inference function.
+
+Usage: python -m benchmarks.inference [--model-path password_model.keras] [--batch-sizes 1 64 1024] [--steps 10]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from generator import DictionaryGenerator
+
+
+def time_steps(step, windows: np.ndarray, steps: int) -> float:
+    step(windows)
+    timings = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        step(windows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-step latency of model.predict and the compiled inference path.")
+    parser.add_argument("--model-path", type=str, default="password_model.keras", help="Model to load; an untrained model is built if it does not exist.")
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=[1, 64, 1024], help="Batch sizes to measure.")
+    parser.add_argument("--steps", type=int, default=10, help="Timed forward passes per batch size.")
+    args = parser.parse_args()
+
+    generator = DictionaryGenerator(model_path=args.model_path, score_workers=1)
+    if os.path.exists(args.model_path):
+        generator.load_or_train_model()
+    else:
+        generator.model = generator.create_model(len(generator.char_to_idx))
+
+    print(f"{'batch':>6} {'predict':>12} {'compiled':>12} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        windows = generator._encode_windows(['password'] * batch_size)
+        predict_time = time_steps(lambda x: generator.model.predict(x, batch_size=len(x), verbose=0), windows, args.steps)
+        compiled_time = time_steps(generator._predict_next, windows, args.steps)
+        print(f"{batch_size:>6} {predict_time * 1000:>10.2f}ms {compiled_time * 1000:>10.2f}ms "
+              f"{predict_time / compiled_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""The hard-coded combination methods that the compiled rule files in rules/ replaced.
+
+Kept verbatim, only lifted out of DictionaryGenerator, as the reference that
+benchmarks.suite times the rule engine against.
+"""
+from typing import List
+
+
+def apply_combination_method(word: str, method: str) -> List[str]:
+    results = []
+    years = range(1960, 2024)
+    common_numbers = ['123', '1234', '12345', '111', '000', '666', '777', '888', '999']
+    special_chars = ['!', '@', '#', '$', '%', '&', '*', '?', '.', '-', '_', '+']
+    
+    if method == 'basic':
+        word_variations = [
+            word.lower(), word.upper(), word.capitalize(),
+            word.title(), word.lower()[::-1],
+        ]
+        
+        for variation in word_variations:
+            results.append(variation)
+            results.extend([f"{variation}{year}" for year in years])
+            results.extend([f"{variation}{num}" for num in common_numbers])
+            results.extend([f"{variation}{char}" for char in special_chars])
+            
+    elif method == 'advanced':
+        base_forms = [word.lower(), word.capitalize()]
+        for base in base_forms:
+            for char in special_chars:
+                for i in range(100):
+                    results.append(f"{base}{char}{i:02d}")
+                    results.append(f"{base}{i:02d}{char}")
+                    results.append(f"{char}{base}{i:02d}")
+            
+            for year in years:
+                results.append(f"{base}{year}")
+                for char in special_chars[:4]:
+                    results.append(f"{base}{char}{year}")
+                    results.append(f"{base}{year}{char}")
+            
+    elif method == 'complex':
+        l33t_map = {
+            'a': '@', 'e': '3', 'i': '1', 'o': '0', 's': '$',
+            't': '7', 'b': '8', 'g': '9', 'l': '1', 'z': '2'
+        }
+        
+        l33t_variations = []
+        word_lower = word.lower()
+        
+        from itertools import combinations
+        chars_to_replace = [c for c in word_lower if c in l33t_map]
+        
+        for r in range(len(chars_to_replace) + 1):
+            for combo in combinations(chars_to_replace, r):
+                temp_word = word_lower
+                for char in combo:
+                    temp_word = temp_word.replace(char, l33t_map[char])
+                l33t_variations.append(temp_word)
+        
+        for variation in l33t_variations:
+            results.append(variation)
+            results.extend([f"{variation}{year}" for year in years])
+            for char in special_chars:
+                results.append(f"{variation}{char}")
+                for num in common_numbers:
+                    results.append(f"{variation}{char}{num}")
+                    results.append(f"{variation}{num}{char}")
+        
+    elif method == 'l33t':
+        l33t_advanced = {
+            'a': ['@', '4'], 'e': ['3'], 'i': ['1', '!'],
+            'o': ['0'], 's': ['$', '5'], 't': ['7', '+'],
+            'b': ['8'], 'g': ['9'], 'l': ['1'], 'z': ['2'],
+            'h': ['#'], 'x': ['*'], 'c': ['(', '{'],
+            'n': ['^'], 'w': ['uu', 'vv'], 'v': ['\\/'],
+            'm': ['nn'], 'k': ['|<'], 'd': ['|)']
+        }
+        
+        def generate_l33t_variations(text, pos=0, current=''):
+            if pos == len(text):
+                results.append(current)
+                return
+            
+            char = text[pos].lower()
+            if char in l33t_advanced:
+                for replacement in l33t_advanced[char]:
+                    generate_l33t_variations(text, pos + 1, current + replacement)
+                generate_l33t_variations(text, pos + 1, current + char)
+            else:
+                generate_l33t_variations(text, pos + 1, current + char)
+        
+        generate_l33t_variations(word)
+        
+        base_results = results.copy()
+        for base in base_results:
+            for year in years:
+                results.append(f"{base}{year}")
+            for num in common_numbers:
+                results.append(f"{base}{num}")
+        
+    elif method == 'custom':
+        pass
+    
+    contextual_suffixes = [
+        '123', '1234', '12345', 'abc', 'xyz', 'qwerty',
+        '111', '000', '!@#', '$%^', '...', '___',
+        'pass', 'pwd', 'password'
+    ]
+    
+    base_results = results.copy()
+    for base in base_results:
+        results.extend([f"{base}{suffix}" for suffix in contextual_suffixes])
+    
+    results = [p for p in results if len(p) >= 8]
+    
+    seen = set()
+    return [x for x in results if not (x in seen or seen.add(x))]
@@ -0,0 +1,77 @@
+"""Startup-time benchmark for a rule-only CLI run with the default flags.
+
+The run uses the default score cache, pre-populated with --cache-entries
+synthetic entries (the default cache size), so its cost is part of the timing.
+
+Usage: python -m benchmarks.startup [--runs 5] [--limit 1.0] [--cache-entries 500000]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+from strength import ScoreCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(command, runs: int, cwd: str) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def populate_cache(path: str, entries: int):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + '!@#$'
+    cache = ScoreCache(path, max_entries=entries)
+    for _ in range(entries):
+        cache.put(''.join(rng.choices(alphabet, k=12)), rng.randrange(5))
+    cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how quickly a rule-only CLI run starts and finishes.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of timed runs.")
+    parser.add_argument("--limit", type=float, default=1.0, help="Maximum allowed median wall time in seconds.")
+    parser.add_argument("--cache-entries", type=int, default=500000, help="Entries written to the score cache before timing.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        populate_cache(os.path.join(workdir, 'score_cache.db'), args.cache_entries)
+        probe = subprocess.run(
+            [sys.executable, '-c', "import sys, main, generator; print('tensorflow' in sys.modules)"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        tensorflow_loaded = probe.stdout.strip() == 'True'
+
+        import_timings = time_command([sys.executable, '-c', 'import main'], args.runs, ROOT)
+        run_timings = time_command([
+            sys.executable, os.path.join(ROOT, 'main.py'),
+            '--user-data', 'John, 1990-05-15',
+            '--max', '10',
+            '--output', os.path.join(workdir, 'startup_output.txt')
+        ], args.runs, workdir)
+
+    import_median = statistics.median(import_timings)
+    run_median = statistics.median(run_timings)
+    print(f"tensorflow imported at startup: {tensorflow_loaded}")
+    print(f"import main:       median {import_median:.3f}s  min {min(import_timings):.3f}s")
+    print(f"rule-only CLI run: median {run_median:.3f}s  min {min(run_timings):.3f}s")
+
+    if tensorflow_loaded or run_median > args.limit:
+        print(f"FAIL: rule-only run must not import tensorflow and must finish within {args.limit:.2f}s")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
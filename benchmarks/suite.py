@@ -0,0 +1,289 @@
+"""Benchmark suite for the generation, scoring, dedupe, I/O and ML stages.
+
+Cases run against the bundled dataset1.txt/dataset2.txt and fixed synthetic
+user profiles, and results are written as JSON. `compare` flags cases whose
+median time grew by more than the threshold and exits non-zero if any did.
+
+Usage: python -m benchmarks.suite run [--output benchmark_results.json] [--repeat 3] [--only combination writer] [--ml]
+       python -m benchmarks.suite compare BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+from benchmarks import legacy
+from dataset_store import build_store
+from dedupe import Deduplicator
+from generator import RANDOM_METHODS, DictionaryGenerator
+from strength import StrengthScorer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [os.path.join(ROOT, 'dataset1.txt'), os.path.join(ROOT, 'dataset2.txt')]
+RESULTS_VERSION = 1
+LEGACY_TOKEN_LENGTH = 12
+
+PROFILES = {
+    'john': {"name": ["John", "Smith"], "birthdate": ["1990-05-15"], "phone": ["+1 555 123 4567"],
+             "favorite": ["Football"]},
+    'maria': {"name": ["Maria", "Garcia"], "birthdate": ["1985-12-01"], "email": ["maria.garcia@example.com"],
+              "pet": ["Rex"]},
+    'alex': {"full_name": ["Alexander Petrov"], "username": ["@apetrov"], "birthdate": ["2001-07-30"],
+             "favorite": ["chess", "Zenit"]},
+}
+
+
+def profile_tokens(generator: DictionaryGenerator, profile: dict) -> list:
+    return generator.sanitize_user_info([item for values in profile.values() for item in values])
+
+
+def replace_scorer(generator: DictionaryGenerator, **options) -> StrengthScorer:
+    """Give `generator` a fresh scorer, closing the one it replaces (cache connection and pool)."""
+    generator.scorer.close()
+    generator.scorer = StrengthScorer(**options)
+    return generator.scorer
+
+
+def measure(function, repeat: int) -> dict:
+    """Run `function` `repeat` times; it returns the number of items it processed."""
+    timings = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = function()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        'seconds': median,
+        'min': min(timings),
+        'runs': timings,
+        'items': items,
+        'per_second': items / median if median else None
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def build_cases(generator: DictionaryGenerator, workdir: str, args) -> list:
+    """Return (name, function) pairs; each function returns the number of items it processed."""
+    tokens = [token for profile in PROFILES.values() for token in profile_tokens(generator, profile)]
+    candidates = (candidate for method in RANDOM_METHODS for token in tokens
+                  for candidate in generator.iter_combination_method(token, method))
+    corpus = list(generator.base_passwords) + list(islice(candidates, args.corpus_size))
+    sample = list(dict.fromkeys(corpus[len(generator.base_passwords):]))[::7][:args.score_sample]
+    cases = []
+
+    for method in RANDOM_METHODS:
+        def combination(method=method):
+            return sum(len(generator.apply_combination_method(token, method)) for token in tokens)
+        cases.append((f"combination/{method}", combination))
+
+    def generate_patterns():
+        return sum(len(generator.generate_patterns(profile_tokens(generator, profile)))
+                   for profile in PROFILES.values())
+    cases.append(("combination/patterns", generate_patterns))
+
+    # the old code has no cap on substitution variants: on the long tokens it
+    # runs out of memory producing candidates the rule files deliberately leave out
+    legacy_tokens = [token for token in tokens if len(token) <= LEGACY_TOKEN_LENGTH]
+    for method in RANDOM_METHODS:
+        def rules(method=method):
+            return sum(len(generator.apply_combination_method(token, method)) for token in legacy_tokens)
+        cases.append((f"vs-legacy/{method}", rules))
+
+        def rules_legacy(method=method):
+            return sum(len(legacy.apply_combination_method(token, method)) for token in legacy_tokens)
+        cases.append((f"vs-legacy/{method}/legacy", rules_legacy))
+
+        # what the pipeline does with a method: expand every token and dedupe across them
+        def deduped(method=method):
+            deduplicator = Deduplicator()
+            try:
+                return sum(len(list(deduplicator.iter_unique(generator.iter_combination_method(token, method))))
+                           for token in legacy_tokens)
+            finally:
+                deduplicator.close()
+        cases.append((f"vs-legacy/{method}/deduped", deduped))
+
+        def deduped_legacy(method=method):
+            deduplicator = Deduplicator()
+            try:
+                return sum(len(list(deduplicator.iter_unique(legacy.apply_combination_method(token, method))))
+                           for token in legacy_tokens)
+            finally:
+                deduplicator.close()
+        cases.append((f"vs-legacy/{method}/deduped/legacy", deduped_legacy))
+
+    def is_strong_password():
+        replace_scorer(generator, workers=1, use_prefilter=False)
+        for candidate in sample:
+            generator.is_strong_password(candidate)
+        return len(sample)
+    cases.append(("scoring/is_strong_password", is_strong_password))
+
+    def iter_strong():
+        scorer = StrengthScorer(workers=1)
+        try:
+            list(scorer.iter_strong(sample))
+            return len(sample)
+        finally:
+            scorer.close()
+    cases.append(("scoring/iter_strong", iter_strong))
+
+    for mode in ['exact', 'bloom']:
+        def dedupe(mode=mode):
+            deduplicator = Deduplicator(mode=mode, memory_limit=64 * 1024 * 1024)
+            try:
+                list(deduplicator.iter_unique(corpus))
+                return len(corpus)
+            finally:
+                deduplicator.close()
+        cases.append((f"dedupe/{mode}", dedupe))
+
+    def dedupe_spill():
+        deduplicator = Deduplicator(memory_limit=len(corpus) * 16, tmp_dir=workdir)
+        try:
+            list(deduplicator.iter_unique(corpus))
+            return len(corpus)
+        finally:
+            deduplicator.close()
+    cases.append(("dedupe/exact-spill", dedupe_spill))
+
+    def compile_datasets():
+        return sum(len(build_store(source, os.path.join(workdir, 'store'))) for source in DATASETS)
+    cases.append(("dataset/compile", compile_datasets))
+
+    for codec in ['none', 'gzip']:
+        def write(codec=codec):
+            return generator.save_to_file(corpus, os.path.join(workdir, 'output.txt'), codec=codec)
+        cases.append((f"writer/{codec}", write))
+
+    for name, profile in PROFILES.items():
+        def pipeline(profile=profile):
+            replace_scorer(generator, workers=1)
+            return sum(1 for _ in generator.iter_personalized(profile, max_combinations=args.pipeline_max,
+                                                              combination_method='basic'))
+        cases.append((f"pipeline/{name}", pipeline))
+
+    if args.ml:
+        if generator.model is None:
+            generator.model = generator.create_model(len(generator.char_to_idx))
+
+        def ml_sample():
+            return len(generator.generate_passwords_with_model('john', num_passwords=args.ml_samples))
+        cases.append(("ml/sample", ml_sample))
+    return cases
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='benchmarks-')
+    generator = DictionaryGenerator(base_datasets=DATASETS, score_workers=1,
+                                    dataset_cache=os.path.join(workdir, 'cache'))
+    if args.ml and os.path.exists(args.model_path):
+        generator.model_path = args.model_path
+        generator.load_or_train_model()
+    try:
+        results = {}
+        for name, function in build_cases(generator, workdir, args):
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = measure(function, args.repeat)
+            entry = results[name]
+            print(f"{name:<36} {entry['seconds'] * 1000:>10.1f}ms {entry['items']:>10,} items", file=sys.stderr)
+        for name, entry in results.items():
+            reference = results.get(f"{name}/legacy")
+            if reference and reference['items'] == entry['items'] and entry['seconds']:
+                print(f"{name:<36} {reference['seconds'] / entry['seconds']:>9.1f}x the legacy speed", file=sys.stderr)
+    finally:
+        generator.scorer.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+def compare(args):
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    with open(args.current, 'r', encoding='utf-8') as file:
+        current = json.load(file)['results']
+
+    regressions = []
+    print(f"{'case':<36} {'baseline':>12} {'current':>12} {'change':>8}  status")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:<36} {'only in ' + ('current' if name in current else 'baseline'):>34}")
+            continue
+        before, after = baseline[name]['seconds'], current[name]['seconds']
+        change = after / before - 1 if before else 0.0
+        status = 'ok'
+        if after - before > args.min_delta and change > args.threshold:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif before - after > args.min_delta and change < -args.threshold:
+            status = 'improved'
+        print(f"{name:<36} {before * 1000:>10.1f}ms {after * 1000:>10.1f}ms {change:>+7.1%}  {status}")
+
+    if regressions:
+        print(f"FAIL: {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite or compare two result files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and write the results as JSON.")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Result file to write.")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case; the median is reported.")
+    run_parser.add_argument("--only", nargs='+', default=None, help="Run only cases whose name starts with one of these prefixes (e.g. combination writer).")
+    run_parser.add_argument("--corpus-size", type=int, default=500000, help="Generated candidates (on top of the datasets) fed to the dedupe and writer cases.")
+    run_parser.add_argument("--score-sample", type=int, default=1000, help="Number of distinct candidates used by the scoring cases.")
+    run_parser.add_argument("--pipeline-max", type=int, default=200, help="Password budget of each end-to-end pipeline case.")
+    run_parser.add_argument("--ml", action="store_true", help="Also benchmark ML sampling (imports TensorFlow).")
+    run_parser.add_argument("--model-path", type=str, default="password_model.keras", help="Model used for ML sampling; an untrained model is built if it does not exist.")
+    run_parser.add_argument("--ml-samples", type=int, default=256, help="Passwords sampled per ML repetition.")
+
+    compare_parser = commands.add_parser('compare', help="Compare two result files and flag regressions.")
+    compare_parser.add_argument("baseline", help="Result file of the reference run.")
+    compare_parser.add_argument("current", help="Result file of the run under test.")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as a regression.")
+    compare_parser.add_argument("--min-delta", type=float, default=0.005, help="Ignore changes smaller than this many seconds.")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
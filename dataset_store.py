@@ -0,0 +1,280 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import numpy as np
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+STORE_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+READ_CHUNK = 1 << 20
+
+
+def entry_hash(entry: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(entry, digest_size=8).digest(), 'little')
+
+
+def _iter_entries(source: str) -> Iterator[bytes]:
+    with open(source, 'rb') as file:
+        for line in file:
+            entry = line.strip()
+            if entry:
+                yield entry
+
+
+def build_store(source: str, target_dir: str) -> 'DatasetStore':
+    """Compile a wordlist into a deduplicated, memory-mappable store.
+
+    The store is a directory of raw arrays: `arena.bin` holds every unique
+    entry followed by a newline, `offsets.bin` the start of each entry,
+    `hashes.bin` a 64-bit BLAKE2b digest per entry and `index.bin` an
+    open-addressing hash table of entry numbers (0 marks an empty slot).
+    Duplicates are detected by digest while building and confirmed against
+    the bytes already in the arena, so a digest collision keeps both entries.
+    """
+    with open(source, 'rb') as file:
+        line_count = sum(chunk.count(b'\n') for chunk in iter(lambda: file.read(READ_CHUNK), b'')) + 1
+    capacity = 1 << max(4, (2 * line_count - 1).bit_length())
+    mask = capacity - 1
+    table = np.zeros(capacity, dtype=np.uint32)
+    hashes = array('Q')
+    offsets = array('q', [0])
+    lines = 0
+
+    tmp_dir = target_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    with open(os.path.join(tmp_dir, 'arena.bin'), 'w+b') as arena:
+        def stored(position: int) -> bytes:
+            start, stop = offsets[position], offsets[position + 1] - 1
+            arena.seek(start)
+            data = arena.read(stop - start)
+            arena.seek(0, os.SEEK_END)
+            return data
+
+        for entry in _iter_entries(source):
+            lines += 1
+            digest = entry_hash(entry)
+            slot = digest & mask
+            while table[slot]:
+                position = int(table[slot]) - 1
+                if hashes[position] == digest and stored(position) == entry:
+                    break
+                slot = (slot + 1) & mask
+            else:
+                hashes.append(digest)
+                table[slot] = len(hashes)
+                arena.write(entry + b'\n')
+                offsets.append(offsets[-1] + len(entry) + 1)
+
+    np.frombuffer(offsets, dtype=np.int64).tofile(os.path.join(tmp_dir, 'offsets.bin'))
+    np.frombuffer(hashes, dtype=np.uint64).tofile(os.path.join(tmp_dir, 'hashes.bin'))
+    table.tofile(os.path.join(tmp_dir, 'index.bin'))
+    stat = os.stat(source)
+    meta = {
+        'version': STORE_VERSION,
+        'source': os.path.abspath(source),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'lines': lines,
+        'count': len(hashes),
+        'arena_bytes': offsets[-1],
+        'capacity': capacity
+    }
+    _write_json(os.path.join(tmp_dir, 'meta.json'), meta)
+
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.replace(tmp_dir, target_dir)
+    logging.info(f"Compiled dataset {source}: {len(hashes)} unique entries into {target_dir}")
+    return DatasetStore(target_dir)
+
+
+def store_path(source: str, cache_dir: str) -> str:
+    key = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(source)}-{key}")
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (IOError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+def read_meta(path: str) -> Optional[dict]:
+    return _read_json(os.path.join(path, 'meta.json'))
+
+
+def file_digest(source: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_stats(store: 'DatasetStore') -> dict:
+    lengths = np.diff(store.offsets) - 1 if len(store) else np.zeros(0, dtype=np.int64)
+    histogram = np.bincount(lengths)
+    return {
+        'lines': store.meta['lines'],
+        'unique': len(store),
+        'bytes': store.meta['size'],
+        'length_histogram': {str(length): int(count) for length, count in enumerate(histogram) if count}
+    }
+
+
+def _is_current(meta: Optional[dict], stat: os.stat_result) -> bool:
+    return (meta is not None and meta.get('version') == STORE_VERSION
+            and meta['size'] == stat.st_size and meta['mtime'] == stat.st_mtime)
+
+
+def sync_datasets(sources: List[str], cache_dir: str) -> Dict[str, dict]:
+    """Bring the compiled stores in `cache_dir` up to date with `sources`.
+
+    A file whose size and mtime match the manifest is skipped without being
+    read.  Otherwise its content hash decides: identical content only has its
+    fingerprint refreshed, changed content is recompiled and its statistics
+    (line count, unique entries, length histogram) recomputed.  A store that
+    open_store already recompiled for the current file is not compiled again;
+    only its fingerprint and statistics are recorded.  Returns the
+    manifest entry of each source with a `status` of unchanged, touched or rebuilt.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    manifest = _read_json(manifest_path) or {}
+    report = {}
+    for source in sources:
+        key = os.path.abspath(source)
+        stat = os.stat(source)
+        path = store_path(source, cache_dir)
+        meta = read_meta(path)
+        entry = manifest.get(key)
+        valid = entry is not None and meta is not None and meta.get('version') == STORE_VERSION
+        if valid and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            status = 'unchanged'
+        else:
+            digest = file_digest(source)
+            if valid and entry['content_hash'] == digest and meta['size'] == stat.st_size:
+                meta['mtime'] = stat.st_mtime
+                _write_json(os.path.join(path, 'meta.json'), meta)
+                status = 'touched'
+            elif _is_current(meta, stat):
+                # open_store already recompiled it during a run without --sync
+                entry = {'stats': dataset_stats(DatasetStore(path))}
+                status = 'touched'
+            else:
+                entry = {'stats': dataset_stats(build_store(source, path))}
+                status = 'rebuilt'
+            entry.update({'size': stat.st_size, 'mtime': stat.st_mtime, 'content_hash': digest, 'store': path})
+            manifest[key] = entry
+        logging.info(f"Dataset {source}: {status}")
+        report[source] = dict(entry, status=status)
+    _write_json(manifest_path, manifest)
+    return report
+
+
+def open_store(source: str, cache_dir: str) -> 'DatasetStore':
+    """Open the compiled store for `source`, compiling it first if it is missing or stale."""
+    path = store_path(source, cache_dir)
+    meta = read_meta(path)
+    stat = os.stat(source)
+    if not _is_current(meta, stat):
+        os.makedirs(cache_dir, exist_ok=True)
+        return build_store(source, path)
+    return DatasetStore(path)
+
+
+class DatasetStore(Sequence):
+    """Read-only, memory-mapped view of a compiled wordlist; pages are shared between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = read_meta(path)
+        if self.meta is None:
+            raise IOError(f"No dataset store at {path}")
+        count = self.meta['count']
+        self.arena = self._map('arena.bin', np.uint8, self.meta['arena_bytes'])
+        self.offsets = self._map('offsets.bin', np.int64, count + 1)
+        self.hashes = self._map('hashes.bin', np.uint64, count)
+        self.index = self._map('index.bin', np.uint32, self.meta['capacity'])
+
+    def _map(self, name: str, dtype, length: int) -> np.ndarray:
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=(length,))
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    @property
+    def arena_path(self) -> str:
+        """The unique entries, one per line, readable as a plain wordlist."""
+        return os.path.join(self.path, 'arena.bin')
+
+    def entry_bytes(self, position: int) -> bytes:
+        return self.arena[self.offsets[position]:self.offsets[position + 1] - 1].tobytes()
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self.entry_bytes(position).decode('utf-8', 'replace')
+
+    def __iter__(self) -> Iterator[str]:
+        step = 65536
+        for start in range(0, len(self), step):
+            stop = min(start + step, len(self))
+            chunk = self.arena[self.offsets[start]:self.offsets[stop] - 1].tobytes()
+            yield from chunk.decode('utf-8', 'replace').split('\n')
+
+    def __contains__(self, word) -> bool:
+        entry = word.encode('utf-8') if isinstance(word, str) else word
+        digest = entry_hash(entry)
+        mask = len(self.index) - 1
+        slot = digest & mask
+        while self.index[slot]:
+            position = int(self.index[slot]) - 1
+            if self.hashes[position] == digest and self.entry_bytes(position) == entry:
+                return True
+            slot = (slot + 1) & mask
+        return False
+
+
+class DatasetCollection(Sequence):
+    """Concatenation of several datasets that behaves like one read-only list."""
+
+    def __init__(self, datasets: List[Sequence[str]]):
+        self.datasets = [dataset for dataset in datasets if len(dataset)]
+
+    def __len__(self) -> int:
+        return sum(len(dataset) for dataset in self.datasets)
+
+    def __getitem__(self, position: int) -> str:
+        if position < 0:
+            position += len(self)
+        for dataset in self.datasets:
+            if position < len(dataset):
+                return dataset[position]
+            position -= len(dataset)
+        raise IndexError(position)
+
+    def __iter__(self) -> Iterator[str]:
+        for dataset in self.datasets:
+            yield from dataset
+
+    def __contains__(self, word) -> bool:
+        return any(word in dataset for dataset in self.datasets)
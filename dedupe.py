@@ -0,0 +1,169 @@
+import os
+import math
+import shutil
+import logging
+import tempfile
+import numpy as np
+from hashlib import blake2b
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+DEDUPE_MODES = ['exact', 'bloom']
+# a str in a set: about 50 bytes of object header and 34 of set slot, plus its characters
+SET_ENTRY_BYTES = 88
+MAX_RUNS = 8
+MERGE_CHUNK = 1 << 20
+
+
+def _hash_batch(batch: List[str]) -> np.ndarray:
+    # the same digest as dataset_store.entry_hash; unlike hash() it is not salted per process
+    return np.frombuffer(b''.join(blake2b(candidate.encode('utf-8'), digest_size=8).digest() for candidate in batch),
+                         dtype='<u8').astype(np.uint64)
+
+
+def _merge_runs(runs: List[np.ndarray], path: str, chunk: int = MERGE_CHUNK) -> np.ndarray:
+    """Merge disjoint sorted uint64 runs into one file, holding about `chunk` values per run in memory."""
+    total = sum(len(run) for run in runs)
+    merged = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint64, shape=(total,))
+    positions = [0] * len(runs)
+    written = 0
+    while written < total:
+        live = [i for i, run in enumerate(runs) if positions[i] < len(run)]
+        pivot = min(runs[i][min(positions[i] + chunk, len(runs[i])) - 1] for i in live)
+        parts = []
+        for i in live:
+            end = int(np.searchsorted(runs[i], pivot, side='right'))
+            parts.append(runs[i][positions[i]:end])
+            positions[i] = end
+        block = np.sort(np.concatenate(parts))
+        merged[written:written + len(block)] = block
+        written += len(block)
+    merged.flush()
+    return np.load(path, mmap_mode='r')
+
+
+class Deduplicator:
+    """Order-preserving streaming dedupe of candidates under a memory budget.
+
+    In 'exact' mode the candidates themselves live in a set until the budget
+    is reached, so a run that fits in memory is exact. Past the budget the set
+    is spilled as a sorted run of 64-bit BLAKE2b digests to a temporary
+    directory, and later candidates are checked against the runs with binary
+    search; runs are merged whenever more than MAX_RUNS accumulate. The digest
+    is the same in every process, so a run is reproducible, and only a digest
+    collision with a spilled candidate can drop a unique one: over n unique
+    candidates the chance of any is about n**2 / 2**65 (3 in 10,000 at 100
+    million). In 'bloom' mode a Bloom filter of digests sized to the budget
+    replaces the set: memory stays fixed, but a false positive (at roughly
+    `fp_rate` up to its capacity) drops a unique candidate.
+    """
+
+    def __init__(self, memory_limit: int = 512 * 1024 * 1024, mode: str = 'exact',
+                 fp_rate: float = 0.001, tmp_dir: Optional[str] = None):
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"Unknown dedupe mode: {mode}")
+        self.mode = mode
+        self.memory_limit = memory_limit
+        self.tmp_root = tmp_dir
+        self._tmp_dir = None
+        self._seen = set()
+        self._seen_bytes = 0
+        self._runs = []
+        self._run_count = 0
+        self.seen_count = 0
+        self.duplicates = 0
+        if mode == 'bloom':
+            self.bloom_bits = max(64, memory_limit * 8)
+            self.bloom_hashes = max(1, int(round(-math.log2(fp_rate))))
+            self.bloom_capacity = int(self.bloom_bits * math.log(2) ** 2 / -math.log(fp_rate))
+            self._bloom = np.zeros((self.bloom_bits + 7) // 8, dtype=np.uint8)
+            self._over_capacity = False
+
+    def _spill(self):
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='dedupe-', dir=self.tmp_root)
+        run = _hash_batch(list(self._seen))
+        run.sort()
+        self._run_count += 1
+        path = os.path.join(self._tmp_dir, f"run-{self._run_count}.npy")
+        np.save(path, run)
+        self._runs.append(np.load(path, mmap_mode='r'))
+        self._seen = set()
+        self._seen_bytes = 0
+        if len(self._runs) > MAX_RUNS:
+            self._run_count += 1
+            path = os.path.join(self._tmp_dir, f"run-{self._run_count}.npy")
+            old_paths = [run.filename for run in self._runs]
+            self._runs = [_merge_runs(self._runs, path)]
+            for old_path in old_paths:
+                os.remove(old_path)
+        logging.debug(f"Dedupe spilled to disk: {len(self._runs)} runs, {self.seen_count} unique so far")
+
+    def _in_runs(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            idx = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[idx] == hashes
+        return found
+
+    def _bloom_positions(self, hashes: np.ndarray) -> np.ndarray:
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.bloom_hashes, dtype=np.uint64)
+        return (low[:, None] + steps * high[:, None]) % np.uint64(self.bloom_bits)
+
+    def _filter_bloom(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self._bloom_positions(hashes)
+        bits = (self._bloom[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        new = ~bits.all(axis=1)
+        fresh = positions[new].ravel()
+        np.bitwise_or.at(self._bloom, fresh >> np.uint64(3),
+                         np.left_shift(1, (fresh & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        if not self._over_capacity and self.seen_count + int(new.sum()) > self.bloom_capacity:
+            self._over_capacity = True
+            logging.warning(f"Bloom dedupe exceeded its capacity of {self.bloom_capacity} entries; "
+                            f"the false-positive rate will rise")
+        return new
+
+    def filter_batch(self, batch: List[str]) -> List[str]:
+        """Return the candidates of `batch` not seen before, in their original order."""
+        if not batch:
+            return []
+        if self.mode == 'bloom':
+            hashes = _hash_batch(batch)
+            _, first = np.unique(hashes, return_index=True)
+            first.sort()
+            kept = first[self._filter_bloom(hashes[first])]
+            fresh = [batch[i] for i in kept]
+        else:
+            seen = self._seen
+            if not self._runs:
+                # one set probe per candidate; the set also drops repeats within the batch
+                fresh = [candidate for candidate in batch if not (candidate in seen or seen.add(candidate))]
+            else:
+                fresh = [candidate for candidate in dict.fromkeys(batch) if candidate not in seen]
+                if fresh:
+                    spilled = self._in_runs(_hash_batch(fresh))
+                    fresh = [candidate for candidate, old in zip(fresh, spilled.tolist()) if not old]
+                seen.update(fresh)
+            self._seen_bytes += SET_ENTRY_BYTES * len(fresh) + sum(map(len, fresh))
+            if self._seen_bytes >= self.memory_limit:
+                self._spill()
+        self.seen_count += len(fresh)
+        self.duplicates += len(batch) - len(fresh)
+        return fresh
+
+    def iter_unique(self, candidates: Iterable[str], batch_size: int = 1024) -> Iterator[str]:
+        candidates = iter(candidates)
+        while True:
+            batch = list(islice(candidates, batch_size))
+            if not batch:
+                break
+            yield from self.filter_batch(batch)
+
+    def close(self):
+        self._runs = []
+        self._seen = set()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
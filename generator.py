@@ -1,47 +1,108 @@
 import numpy as np
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from itertools import accumulate, chain, islice
 import os
-import gzip
 import logging
 import random
+import threading
 from tqdm import tqdm
 from utils import generate_password_list
-from zxcvbn import zxcvbn
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Embedding, Dropout, Bidirectional, Conv1D
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from strength import StrengthScorer
+from dataset_store import DatasetCollection, DatasetStore, entry_hash, open_store
+from dedupe import Deduplicator
+from rules import load_plan
+from writer import BlockWriter
+from profiling import MethodStats, StageProfiler
+
+RANDOM_METHODS = ['basic', 'advanced', 'complex', 'l33t']
+EXPAND_STAGES = ['expand/rules', 'expand/patterns', 'expand/ml', 'expand/cross_word', 'expand/transformations']
+
+
+class GenerationCancelled(Exception):
+    """Raised inside the pipeline once the generator's cancel_event is set."""
+
+
+def _untracked(method: str, token: str, candidates):
+    return candidates
+
+
+def _uncounted(field: str, candidates):
+    return candidates
+
+
+def _expand_unit(word: str, method: str) -> List[List[str]]:
+    return list(load_plan(method).iter_candidate_chunks(word))
+
 
 class DictionaryGenerator:
-    def __init__(self, base_datasets: List[str] = None, model_path="password_model.keras"):
-        self.base_passwords = []
-        if base_datasets:
-            for dataset in base_datasets:
-                self.base_passwords.extend(self.load_dataset(dataset))
+    def __init__(self, base_datasets: List[str] = None, model_path="password_model.keras",
+                 score_workers: int = None, score_cache: str = None, score_cache_size: int = 500000,
+                 use_prefilter: bool = True, prefilter_reject_bits: float = 22.0, ml_samples: int = 10,
+                 dataset_cache: str = ".dataset_cache", dedupe_memory: int = 512 * 1024 * 1024,
+                 dedupe_mode: str = 'exact', bloom_fp_rate: float = 0.001, workers: int = 1,
+                 seed: int = None, shard: Tuple[int, int] = None, profiler: StageProfiler = None,
+                 cancel_event: threading.Event = None):
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.cancel_event = cancel_event
+        self.dataset_cache = dataset_cache
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.shard = shard
+        self.workers = workers
+        self.dedupe_memory = dedupe_memory
+        self.dedupe_mode = dedupe_mode
+        self.bloom_fp_rate = bloom_fp_rate
+        self.dataset_paths = [dataset for dataset in base_datasets or [] if dataset]
+        with self.profiler.timed('load_datasets') as record:
+            self.base_passwords = DatasetCollection([self.load_dataset(dataset) for dataset in self.dataset_paths])
+            record['out'] = len(self.base_passwords)
         self.model_path = model_path
         self.char_to_idx = {}
         self.idx_to_char = {}
         self.model = None
+        self._inference_fn = None
+        self._inference_model = None
         self.max_sequence_length = 32  
         self.vocab_size = 256 
         
-        all_chars = set(''.join([chr(i) for i in range(32, 127)])) 
+        all_chars = set(''.join([chr(i) for i in range(32, 127)])) | {'\0'}
         self.char_to_idx = {char: idx for idx, char in enumerate(sorted(all_chars))}
         self.idx_to_char = {idx: char for char, idx in self.char_to_idx.items()}
 
         self.min_password_length = 8
         self.char_embedding_size = 256
         self.pattern_memory = {}
+        self.ml_samples = ml_samples
+        self.scorer = StrengthScorer(workers=score_workers, cache_path=score_cache,
+                                     cache_size=score_cache_size, use_prefilter=use_prefilter,
+                                     reject_bits=prefilter_reject_bits)
 
-    def load_dataset(self, file_path: str) -> List[str]:
+    def load_dataset(self, file_path: str) -> Sequence[str]:
         try:
             if not file_path:
                 return []
+            if self.dataset_cache:
+                return open_store(file_path, self.dataset_cache)
             with open(file_path, 'r', encoding='utf-8') as file:
                 return [line.strip() for line in file.readlines() if line.strip()]
         except Exception as e:
             logging.error(f"Error loading dataset {file_path}: {e}")
             return []
 
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise GenerationCancelled()
+
+    def _cancellable(self, candidates: Iterable[str]) -> Iterator[str]:
+        for candidate in candidates:
+            self.check_cancelled()
+            yield candidate
+
     def sanitize_user_info(self, user_info: List[str]) -> List[str]:
         sanitized = []
         for info in user_info:
@@ -51,35 +112,111 @@ class DictionaryGenerator:
             sanitized.append(clean_info)
         return sanitized
 
-    def preprocess_data(self):
+    def _index_dtype(self):
+        return np.int8 if len(self.char_to_idx) <= np.iinfo(np.int8).max else np.int16
+
+    def _encode_passwords(self, passwords) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack passwords into a (count, longest + 1) index matrix, each row terminated by the end token."""
+        pad, end = self.char_to_idx[' '], self.char_to_idx['\0']
+        table = np.full(128, pad, dtype=self._index_dtype())
+        for char, idx in self.char_to_idx.items():
+            table[ord(char)] = idx
+
+        encoded = [password.encode('ascii', 'ignore') for password in passwords]
+        lengths = np.fromiter((len(raw) for raw in encoded), dtype=np.int64, count=len(encoded))
+        starts = np.cumsum(lengths) - lengths
+        matrix = np.full((len(encoded), int(lengths.max(initial=0)) + 1), pad, dtype=self._index_dtype())
+        rows = np.repeat(np.arange(len(encoded)), lengths)
+        columns = np.arange(int(lengths.sum())) - np.repeat(starts, lengths)
+        matrix[rows, columns] = table[np.frombuffer(b''.join(encoded), dtype=np.uint8)]
+        matrix[np.arange(len(encoded)), lengths] = end
+        return matrix, lengths
+
+    def preprocess_data(self, chunk_size: int = 262144):
+        """Build integer training windows and sparse next-character targets with vectorized NumPy.
+
+        Every prefix of every password becomes one sample: the last
+        max_sequence_length characters, left-aligned and space-padded, with the
+        following character (or the end token) as its target.
+        """
         if not self.base_passwords:
             self.base_passwords = generate_password_list(8, 16, 1000)
 
-        sequences = []
-        next_chars = []
-        
-        for password in self.base_passwords:
-            for i in range(len(password)):
-                seq = password[max(0, i-self.max_sequence_length+1):i+1]
-                seq = seq.ljust(self.max_sequence_length)[:self.max_sequence_length]
-                sequences.append(seq)
-                
-                next_char = password[i+1] if i+1 < len(password) else '\0'
-                next_chars.append(next_char)
+        matrix, lengths = self._encode_passwords(self.base_passwords)
+        pad = self.char_to_idx[' ']
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        positions = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
 
-        X = np.zeros((len(sequences), self.max_sequence_length, len(self.char_to_idx)), dtype=np.float32)
-        y = np.zeros((len(sequences), len(self.char_to_idx)), dtype=np.float32)
-        
-        for i, (sequence, next_char) in enumerate(zip(sequences, next_chars)):
-            for t, char in enumerate(sequence):
-                if char in self.char_to_idx:
-                    X[i, t, self.char_to_idx[char]] = 1.0
-            if next_char in self.char_to_idx:
-                y[i, self.char_to_idx[next_char]] = 1.0
+        X = np.empty((len(rows), self.max_sequence_length), dtype=self._index_dtype())
+        y = matrix[rows, positions + 1]
+        offsets = np.arange(self.max_sequence_length)
+        for start in range(0, len(rows), chunk_size):
+            chunk_rows = rows[start:start + chunk_size, None]
+            chunk_positions = positions[start:start + chunk_size, None]
+            columns = np.maximum(chunk_positions - self.max_sequence_length + 1, 0) + offsets
+            window = matrix[chunk_rows, np.minimum(columns, matrix.shape[1] - 1)]
+            X[start:start + chunk_size] = np.where(columns <= chunk_positions, window, pad)
 
         return X, y, len(self.char_to_idx)
 
+    def _training_files(self) -> List[str]:
+        """Files streaming training reads; with a dataset cache, the stores' deduplicated entries, as in base_passwords."""
+        if self.dataset_cache:
+            return [dataset.arena_path for dataset in self.base_passwords.datasets if isinstance(dataset, DatasetStore)]
+        return self.dataset_paths
+
+    def _streaming_dataset(self, files: List[str], validation: bool, batch_size: int, shuffle_buffer: int,
+                           validation_buckets: int = 10):
+        """tf.data pipeline that reads dataset files lazily and yields (window, target) batches.
+
+        Files are read as interleaved shards with parallel windowing and prefetch,
+        so memory stays bounded by the shuffle buffers. Lines are split into
+        training and validation sets by a stable hash.
+        """
+        import tensorflow as tf
+
+        autotune = tf.data.AUTOTUNE
+        length = self.max_sequence_length
+        pad, end = self.char_to_idx[' '], self.char_to_idx['\0']
+        table = [pad] * 128
+        for char, idx in self.char_to_idx.items():
+            table[ord(char)] = idx
+        table = tf.constant(table, dtype=tf.int32)
+
+        def to_windows(line):
+            codes = tf.strings.unicode_decode(line, 'UTF-8', errors='ignore')
+            ids = tf.gather(table, tf.boolean_mask(codes, codes < 128))
+            size = tf.size(ids)
+            padded = tf.concat([ids, [end]], axis=0)
+            positions = tf.range(size)
+            columns = tf.maximum(positions - length + 1, 0)[:, None] + tf.range(length)[None, :]
+            windows = tf.where(columns <= positions[:, None], tf.gather(padded, tf.minimum(columns, size)), pad)
+            return tf.cast(windows, tf.int8), tf.cast(tf.gather(padded, positions + 1), tf.int8)
+
+        lines = tf.data.Dataset.from_tensor_slices(files).interleave(
+            tf.data.TextLineDataset, cycle_length=max(1, min(len(files), os.cpu_count() or 1)),
+            num_parallel_calls=autotune, deterministic=False
+        )
+        lines = lines.map(tf.strings.strip, num_parallel_calls=autotune)
+        lines = lines.filter(lambda line: tf.strings.length(line) > 0)
+
+        def in_validation(line):
+            return tf.strings.to_hash_bucket_fast(line, validation_buckets) == 0
+
+        if validation:
+            lines = lines.filter(in_validation)
+        else:
+            lines = lines.filter(lambda line: tf.logical_not(in_validation(line))).shuffle(shuffle_buffer)
+
+        samples = lines.map(to_windows, num_parallel_calls=autotune, deterministic=False).unbatch()
+        if not validation:
+            samples = samples.shuffle(shuffle_buffer)
+        return samples.batch(batch_size).prefetch(autotune)
+
     def create_model(self, vocab_size):
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Embedding, Dropout, Bidirectional
+
         model = Sequential([
             Embedding(vocab_size, self.char_embedding_size, 
                      input_length=self.max_sequence_length),
@@ -94,18 +231,32 @@ class DictionaryGenerator:
         ])
         
         model.compile(
-            loss='categorical_crossentropy',
+            loss='sparse_categorical_crossentropy',
             optimizer='adam',
             metrics=['accuracy']
         )
         return model
 
-    def train_model(self):
+    def train_model(self, streaming: bool = False, batch_size: int = 256, shuffle_buffer: int = 100000):
         try:
-            X, y, vocab_size = self.preprocess_data()
-            if X is None or len(X) == 0:
-                logging.error("No training data available")
-                return False
+            from tensorflow.keras.callbacks import EarlyStopping, LambdaCallback, ModelCheckpoint
+
+            if streaming:
+                files = self._training_files()
+                if not files:
+                    logging.error("Streaming training requires dataset files")
+                    return False
+                fit_data = {
+                    'x': self._streaming_dataset(files, False, batch_size, shuffle_buffer),
+                    'validation_data': self._streaming_dataset(files, True, batch_size, shuffle_buffer)
+                }
+                vocab_size = len(self.char_to_idx)
+            else:
+                X, y, vocab_size = self.preprocess_data()
+                if X is None or len(X) == 0:
+                    logging.error("No training data available")
+                    return False
+                fit_data = {'x': X, 'y': y, 'batch_size': 32, 'validation_split': 0.2}
 
             model = self.create_model(vocab_size)
             
@@ -118,15 +269,14 @@ class DictionaryGenerator:
                 ModelCheckpoint(
                     self.model_path,
                     monitor='val_loss',
-                    save_best_weights_only=True
-                )
+                    save_best_only=True
+                ),
+                LambdaCallback(on_train_batch_end=lambda batch, logs: self.check_cancelled())
             ]
 
             model.fit(
-                X, y,
-                batch_size=32,
+                **fit_data,
                 epochs=50,
-                validation_split=0.2,
                 callbacks=callbacks,
                 verbose=1
             )
@@ -135,55 +285,95 @@ class DictionaryGenerator:
             model.save(self.model_path)
             
             return True
-            
+
+        except GenerationCancelled:
+            raise
         except Exception as e:
             logging.error(f"Model training failed: {str(e)}")
             return False
 
-    def load_or_train_model(self):
+    def load_or_train_model(self, streaming: bool = False):
         try:
             if os.path.exists(self.model_path):
                 logging.info("Loading existing model...")
+                from tensorflow.keras.models import load_model
                 self.model = load_model(self.model_path)
                 return True
             else:
                 logging.info("No existing model found. Training new model...")
-                return self.train_model()
+                return self.train_model(streaming=streaming)
+        except GenerationCancelled:
+            raise
         except Exception as e:
             logging.error(f"Error loading/training model: {e}")
             return False
 
-    def generate_passwords_with_model(self, seed_text: str, num_passwords: int = 10, max_length: int = 16) -> List[str]:
-        if not self.model:
-            return []
+    def _encode_windows(self, texts: List[str]) -> np.ndarray:
+        pad = self.char_to_idx[' ']
+        windows = np.full((len(texts), self.max_sequence_length), pad, dtype=np.int32)
+        for row, text in enumerate(texts):
+            for t, char in enumerate(text[-self.max_sequence_length:]):
+                windows[row, t] = self.char_to_idx.get(char, pad)
+        return windows
 
-        passwords = []
-        for _ in tqdm(range(num_passwords)):
-            current = seed_text[:self.max_sequence_length]
-            current = current.ljust(self.max_sequence_length)[:self.max_sequence_length]
-            
-            password = seed_text
-            
-            while len(password) < max_length:
-                x_pred = np.zeros((1, self.max_sequence_length, len(self.char_to_idx)))
-                for t, char in enumerate(current):
-                    if char in self.char_to_idx:
-                        x_pred[0, t, self.char_to_idx[char]] = 1.0
+    def _get_inference_fn(self):
+        """Trace the model call once so sampling skips model.predict's per-call data adapter setup."""
+        if self._inference_fn is None or self._inference_model is not self.model:
+            import tensorflow as tf
 
-                preds = self.model.predict(x_pred, verbose=0)[0]
-                next_index = np.random.choice(len(preds), p=preds)
-                next_char = self.idx_to_char[next_index]
+            model = self.model
+            signature = [tf.TensorSpec((None, self.max_sequence_length), tf.int32)]
+            self._inference_fn = tf.function(lambda windows: model(windows, training=False),
+                                             input_signature=signature)
+            self._inference_model = model
+        return self._inference_fn
 
-                if next_char == '\0' or len(password) >= max_length:
-                    break
+    def _predict_next(self, windows: np.ndarray) -> np.ndarray:
+        return self._get_inference_fn()(windows).numpy()
 
-                password += next_char
-                current = password[-self.max_sequence_length:]
-                current = current.ljust(self.max_sequence_length)[:self.max_sequence_length]
+    def _sample_batch(self, seed_text: str, count: int, max_length: int, progress) -> List[str]:
+        windows = np.repeat(self._encode_windows([seed_text]), count, axis=0)
+        suffixes = [[] for _ in range(count)]
+        active = np.arange(count)
+        length = len(seed_text)
+        end_index = self.char_to_idx.get('\0')
 
-            if len(password) >= self.min_password_length:
-                passwords.append(password)
+        while length < max_length and len(active):
+            preds = self._predict_next(windows[active])
+            cumulative = np.cumsum(preds, axis=1)
+            draws = self.np_rng.random((len(active), 1)) * cumulative[:, -1:]
+            next_indices = (cumulative < draws).sum(axis=1).clip(max=preds.shape[1] - 1)
 
+            if end_index is not None:
+                finished = next_indices == end_index
+                progress.update(int(finished.sum()))
+                active, next_indices = active[~finished], next_indices[~finished]
+
+            for row, index in zip(active, next_indices):
+                suffixes[row].append(self.idx_to_char[index])
+            if length < self.max_sequence_length:
+                windows[active, length] = next_indices
+            else:
+                windows[active, :-1] = windows[active, 1:]
+                windows[active, -1] = next_indices
+            length += 1
+
+        progress.update(len(active))
+        passwords = [seed_text + ''.join(suffix) for suffix in suffixes]
+        return [password for password in passwords if len(password) >= self.min_password_length]
+
+    def generate_passwords_with_model(self, seed_text: str, num_passwords: int = 10, max_length: int = 16,
+                                      batch_size: int = 1024) -> List[str]:
+        """Sample passwords from the model, advancing a whole batch of sequences per forward pass."""
+        if not self.model:
+            return []
+
+        passwords = []
+        with tqdm(total=num_passwords) as progress:
+            for start in range(0, num_passwords, batch_size):
+                self.check_cancelled()
+                count = min(batch_size, num_passwords - start)
+                passwords.extend(self._sample_batch(seed_text, count, max_length, progress))
         return passwords
 
     def generate_patterns(self, user_info: List[str]) -> List[str]:
@@ -208,198 +398,316 @@ class DictionaryGenerator:
                 patterns.append(f"{valid_info[i]}_{valid_info[j]}")
                 patterns.append(f"{valid_info[i]}-{valid_info[j]}")
                 
-        return list(set(patterns))
+        return list(dict.fromkeys(patterns))
+
+    def iter_combination_method(self, word: str, method: str) -> Iterator[str]:
+        """Lazily yield the (undeduplicated) candidates of one rule set for one word."""
+        return load_plan(method).iter_candidates(word)
+
+    def count_combination_method(self, word: str, method: str) -> Dict[str, int]:
+        """Exact number of candidates iter_combination_method yields, split into base and contextual phases."""
+        return load_plan(method).count(word)
 
     def apply_combination_method(self, word: str, method: str) -> List[str]:
-        results = []
-        years = range(1960, 2024)
-        common_numbers = ['123', '1234', '12345', '111', '000', '666', '777', '888', '999']
-        special_chars = ['!', '@', '#', '$', '%', '&', '*', '?', '.', '-', '_', '+']
-        
-        if method == 'basic':
-            word_variations = [
-                word.lower(), word.upper(), word.capitalize(),
-                word.title(), word.lower()[::-1],
-            ]
-            
-            for variation in word_variations:
-                results.append(variation)
-                results.extend([f"{variation}{year}" for year in years])
-                results.extend([f"{variation}{num}" for num in common_numbers])
-                results.extend([f"{variation}{char}" for char in special_chars])
-                
-        elif method == 'advanced':
-            base_forms = [word.lower(), word.capitalize()]
-            for base in base_forms:
-                for char in special_chars:
-                    for i in range(100):
-                        results.append(f"{base}{char}{i:02d}")
-                        results.append(f"{base}{i:02d}{char}")
-                        results.append(f"{char}{base}{i:02d}")
-                
-                for year in years:
-                    results.append(f"{base}{year}")
-                    for char in special_chars[:4]:
-                        results.append(f"{base}{char}{year}")
-                        results.append(f"{base}{year}{char}")
-                
-        elif method == 'complex':
-            l33t_map = {
-                'a': '@', 'e': '3', 'i': '1', 'o': '0', 's': '$',
-                't': '7', 'b': '8', 'g': '9', 'l': '1', 'z': '2'
-            }
-            
-            l33t_variations = []
-            word_lower = word.lower()
-            
-            from itertools import combinations
-            chars_to_replace = [c for c in word_lower if c in l33t_map]
-            
-            for r in range(len(chars_to_replace) + 1):
-                for combo in combinations(chars_to_replace, r):
-                    temp_word = word_lower
-                    for char in combo:
-                        temp_word = temp_word.replace(char, l33t_map[char])
-                    l33t_variations.append(temp_word)
-            
-            for variation in l33t_variations:
-                results.append(variation)
-                results.extend([f"{variation}{year}" for year in years])
-                for char in special_chars:
-                    results.append(f"{variation}{char}")
-                    for num in common_numbers:
-                        results.append(f"{variation}{char}{num}")
-                        results.append(f"{variation}{num}{char}")
-            
-        elif method == 'l33t':
-            l33t_advanced = {
-                'a': ['@', '4'], 'e': ['3'], 'i': ['1', '!'],
-                'o': ['0'], 's': ['$', '5'], 't': ['7', '+'],
-                'b': ['8'], 'g': ['9'], 'l': ['1'], 'z': ['2'],
-                'h': ['#'], 'x': ['*'], 'c': ['(', '{'],
-                'n': ['^'], 'w': ['uu', 'vv'], 'v': ['\\/'],
-                'm': ['nn'], 'k': ['|<'], 'd': ['|)']
-            }
-            
-            def generate_l33t_variations(text, pos=0, current=''):
-                if pos == len(text):
-                    results.append(current)
-                    return
-                
-                char = text[pos].lower()
-                if char in l33t_advanced:
-                    for replacement in l33t_advanced[char]:
-                        generate_l33t_variations(text, pos + 1, current + replacement)
-                    generate_l33t_variations(text, pos + 1, current + char)
+        return list(chain.from_iterable(load_plan(method).iter_unique_chunks(word)))
+
+    def _apply_custom_pattern(self, word: str, custom_pattern: str) -> str:
+        pattern = custom_pattern
+        pattern = pattern.replace('[word]', word)
+        pattern = pattern.replace('[name]', word.capitalize())
+        pattern = pattern.replace('[number]', str(self.rng.randint(0, 999)))
+        pattern = pattern.replace('[symbol]', self.rng.choice('!@#$%&*'))
+        return pattern
+
+    def _iter_rule_units(self, user_info: List[str], combination_method: str,
+                         custom_pattern: str) -> Iterator[Tuple[str, str, Iterable[str]]]:
+        """Yield (word, method, candidates) for every user token, with 'random' resolved to a concrete method."""
+        if self.workers > 1 and combination_method != 'custom':
+            methods = [self.rng.choice(RANDOM_METHODS) if combination_method == 'random' else combination_method
+                       for word in user_info]
+            yield from self._iter_parallel_units(list(zip(user_info, methods)))
+        else:
+            for word in user_info:
+                if combination_method == 'random':
+                    method = self.rng.choice(RANDOM_METHODS)
+                    yield word, method, self.iter_combination_method(word, method)
+                elif combination_method == 'custom':
+                    if custom_pattern:
+                        yield word, 'custom', [self._apply_custom_pattern(word, custom_pattern)]
                 else:
-                    generate_l33t_variations(text, pos + 1, current + char)
-            
-            generate_l33t_variations(word)
-            
-            base_results = results.copy()
-            for base in base_results:
-                for year in years:
-                    results.append(f"{base}{year}")
-                for num in common_numbers:
-                    results.append(f"{base}{num}")
-            
-        elif method == 'custom':
-            pass
-        
-        contextual_suffixes = [
-            '123', '1234', '12345', 'abc', 'xyz', 'qwerty',
-            '111', '000', '!@#', '$%^', '...', '___',
-            'pass', 'pwd', 'password'
-        ]
-        
-        base_results = results.copy()
-        for base in base_results:
-            results.extend([f"{base}{suffix}" for suffix in contextual_suffixes])
-        
-        results = [p for p in results if len(p) >= 8]
-        
-        seen = set()
-        return [x for x in results if not (x in seen or seen.add(x))]
+                    yield word, combination_method, self.iter_combination_method(word, combination_method)
 
-    def generate_personalized_list(self, user_data: Dict[str, List[str]], max_combinations: int = 100000, 
-                                 use_ml: bool = False,
-                                 combination_method: str = 'basic',
-                                 custom_pattern: str = '',
-                                 min_length: int = 8) -> List[str]:
-        user_info = [item for sublist in user_data.values() for item in sublist]
-        user_info = self.sanitize_user_info(user_info)
-        
-        passwords = []
-        
-        for word in user_info:
-            if combination_method == 'random':
-                methods = ['basic', 'advanced', 'complex', 'l33t']
-                method = random.choice(methods)
-                passwords.extend(self.apply_combination_method(word, method))
-            elif combination_method == 'custom' and custom_pattern:
-                pattern = custom_pattern
-                pattern = pattern.replace('[word]', word)
-                pattern = pattern.replace('[name]', word.capitalize())
-                pattern = pattern.replace('[number]', str(random.randint(0, 999)))
-                pattern = pattern.replace('[symbol]', random.choice('!@#$%&*'))
-                passwords.append(pattern)
-            else:
-                passwords.extend(self.apply_combination_method(word, combination_method))
+    def _expand_candidates(self, user_info: List[str], use_ml: bool, combination_method: str,
+                           custom_pattern: str, stats: MethodStats = None) -> Iterator[str]:
+        stage = self.profiler.stage
+        track = stats.track if stats is not None else _untracked
+        rule_candidates = (candidate for word, method, candidates
+                           in self._iter_rule_units(user_info, combination_method, custom_pattern)
+                           for candidate in track(method, word, candidates))
+        yield from stage('expand/rules', rule_candidates)
+        yield from stage('expand/patterns', track('patterns', '', lambda: self.generate_patterns(user_info)))
 
-        pattern_passwords = self.generate_patterns(user_info)
-        passwords.extend(pattern_passwords)
-        
         if use_ml and self.model and user_info:
-            model_passwords = self.generate_passwords_with_model(user_info[0])
-            passwords.extend(model_passwords)
-        
-        related_combinations = []
-        words = user_info.copy()
-        
+            yield from stage('expand/ml', track('ml', user_info[0], lambda: self.generate_passwords_with_model(
+                user_info[0], num_passwords=self.ml_samples)))
+
+        yield from stage('expand/cross_word', track('cross_word', '', self._iter_cross_word(user_info)))
+        yield from stage('expand/transformations', track('transformations', '', self._iter_transformations(user_info)))
+
+    def _iter_parallel_units(self, units: List[Tuple[str, str]]) -> Iterator[Tuple[str, str, Iterable[str]]]:
+        """Expand (word, method) units in a process pool, yielding results in submission order.
+
+        At most two units per worker are in flight, so a run that stops early does not
+        expand the whole token list. Units come back in the same order as the serial
+        path, so the output of the global dedupe is identical.
+        """
+        # spawn rather than fork: the parent may already hold TensorFlow state
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        pending = deque()
+        units = iter(units)
+        try:
+            for word, method in islice(units, self.workers * 2):
+                pending.append((word, method, executor.submit(_expand_unit, word, method)))
+            while pending:
+                word, method, future = pending.popleft()
+                chunks = future.result()
+                for next_word, next_method in islice(units, 1):
+                    pending.append((next_word, next_method, executor.submit(_expand_unit, next_word, next_method)))
+                yield word, method, chain.from_iterable(chunks)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_cross_word(self, words: List[str]) -> Iterator[str]:
         for i in range(len(words)):
             for j in range(i + 1, len(words)):
                 word1, word2 = words[i], words[j]
-                related_combinations.extend([
+                yield from [
                     f"{word1}{word2}",
                     f"{word1}_{word2}",
                     f"{word1.capitalize()}{word2}",
                     f"{word1[:3]}{word2[:3]}",
                     f"{word1}{word2[:3]}",
                     f"{word1[:1]}{word2}"
-                ])
-
-        passwords.extend(related_combinations)
+                ]
 
-        for word in user_info:
+    def _iter_transformations(self, words: List[str]) -> Iterator[str]:
+        for word in words:
             if len(word) >= 3:
-                transformations = [
+                yield from [
                     word * 2,
                     word + word[::-1],
                     ''.join([c * 2 for c in word]),
                     ''.join(c if i % 2 == 0 else c.upper() for i, c in enumerate(word.lower()))
                 ]
-                passwords.extend(transformations)
 
-        unique_passwords = list(dict.fromkeys(passwords))[:max_combinations]
-        
-        strong_passwords = [pwd for pwd in unique_passwords if self.is_strong_password(pwd) and len(pwd) >= min_length]
-        
-        return strong_passwords
+    def _in_shard(self, candidates: Iterable[str]) -> Iterator[str]:
+        """Keep the candidates owned by this shard; ownership depends only on the candidate text."""
+        if not self.shard:
+            yield from candidates
+            return
+        index, count = self.shard
+        for candidate in candidates:
+            if entry_hash(candidate.encode('utf-8')) % count == index:
+                yield candidate
 
-    def save_to_file(self, password_list: List[str], file_name: str, compress: bool = False):
-        filtered_passwords = [pwd for pwd in password_list if "<SPORTS_TEAM/HOBBY>" not in pwd]
+    def _dedupe(self, candidates: Iterable[str]) -> Iterator[str]:
+        deduplicator = Deduplicator(self.dedupe_memory, self.dedupe_mode, self.bloom_fp_rate)
         try:
-            if compress:
-                with gzip.open(file_name + '.gz', 'wt', encoding='utf-8') as file:
-                    for password in filtered_passwords:
-                        file.write(f"{password}\n")
-            else:
-                with open(file_name, 'w', encoding='utf-8') as file:
-                    for password in filtered_passwords:
-                        file.write(f"{password}\n")
-        except IOError as e:
-            logging.error(f"Error saving file {file_name}: {e}")
+            yield from deduplicator.iter_unique(candidates)
+        finally:
+            logging.info(f"Dedupe: {deduplicator.seen_count} unique, {deduplicator.duplicates} duplicates dropped")
+            deduplicator.close()
+
+    def iter_personalized(self, user_data: Dict[str, List[str]], max_combinations: int = 100000,
+                          use_ml: bool = False,
+                          combination_method: str = 'basic',
+                          custom_pattern: str = '',
+                          min_length: int = 8,
+                          stats: MethodStats = None) -> Iterator[str]:
+        """Lazily yield up to max_combinations strong candidates.
+
+        Stages are pulled from the end: the strength filter only asks for as many
+        candidates as the remaining budget needs, so expansion stops as soon as
+        the budget is met. With a shard set, candidates are split before dedupe,
+        so every node only dedupes and scores its own slice. Passing a MethodStats
+        collects per method and per token yield while iterating. Once cancel_event
+        is set, the next candidate raises GenerationCancelled.
+        """
+        user_info = [item for sublist in user_data.values() for item in sublist]
+        user_info = self.sanitize_user_info(user_info)
+
+        stage = self.profiler.stage
+        count = stats.count if stats is not None else _uncounted
+        candidates = stage('expand', self._expand_candidates(user_info, use_ml, combination_method, custom_pattern,
+                                                             stats), inputs=EXPAND_STAGES)
+        if self.cancel_event is not None:
+            candidates = self._cancellable(candidates)
+        sharded = stage('shard', self._in_shard(candidates), inputs=['expand'])
+        unique = count('unique', stage('dedupe', self._dedupe(sharded), inputs=['shard']))
+        long_enough = count('length_passed', stage('length_filter', (pwd for pwd in unique if len(pwd) >= min_length),
+                                                   inputs=['dedupe']))
+        budget_cut = self.scorer.budget_cut
+        try:
+            yield from count('strength_passed', stage('strength', self.scorer.iter_strong(long_enough,
+                                                                                          limit=max_combinations),
+                                                      inputs=['length_filter']))
+        finally:
+            self.profiler.record_budget_cut('strength', self.scorer.budget_cut - budget_cut)
+            self.scorer.cache.save()
+            logging.info(f"Strength tiers: {self.scorer.tier_report()}")
+
+    def generate_personalized_list(self, user_data: Dict[str, List[str]], max_combinations: int = 100000, 
+                                 use_ml: bool = False,
+                                 combination_method: str = 'basic',
+                                 custom_pattern: str = '',
+                                 min_length: int = 8,
+                                 with_stats: bool = False) -> Union[List[str], Tuple[List[str], dict]]:
+        """Return the generated list, or (list, MethodStats report) when with_stats is set."""
+        stats = MethodStats() if with_stats else None
+        passwords = list(self.iter_personalized(user_data, max_combinations, use_ml,
+                                                combination_method, custom_pattern, min_length, stats))
+        return (passwords, stats.report()) if with_stats else passwords
+
+    @staticmethod
+    def _plan_population(plan, word: str) -> List[Tuple[int, Callable[[int], str]]]:
+        """One rule plan's candidates for one word as (size, pick) index spaces, without building them all.
+
+        The base phase, a small fraction of the output, is expanded and deduplicated
+        so repeats (l/u/c of a digit token) are not counted; the contextual phase is
+        indexed as (distinct base, suffix) pairs. pick returns '' for a candidate
+        the plan's own length guard drops.
+        """
+        bases = list(dict.fromkeys(chain.from_iterable(plan.iter_base_chunks(word))))
+        suffixes, guard = plan.suffixes, plan.min_length
+
+        def base(index: int) -> str:
+            return bases[index] if len(bases[index]) >= guard else ''
+
+        def contextual(index: int) -> str:
+            candidate = bases[index // len(suffixes)] + suffixes[index % len(suffixes)]
+            return candidate if len(candidate) >= guard else ''
+
+        population = [(len(bases), base)]
+        if suffixes:
+            population.append((len(bases) * len(suffixes), contextual))
+        return population
+
+    @staticmethod
+    def _listed(candidates: Iterable[str]) -> List[Tuple[int, Callable[[int], str]]]:
+        candidates = list(dict.fromkeys(candidates))
+        return [(len(candidates), candidates.__getitem__)]
+
+    def estimate_size(self, user_data: Dict[str, List[str]], max_combinations: int = 100000,
+                      use_ml: bool = False,
+                      combination_method: str = 'basic',
+                      custom_pattern: str = '',
+                      min_length: int = 8,
+                      sample_size: int = 256) -> Dict:
+        """Estimate the size of a run without generating it.
+
+        'upper_bound' is the exact candidate count before dedupe and filtering,
+        counted analytically per stage.  'estimated' scales each stage by the
+        dedupe and strength pass rate of its share of one sample of sample_size
+        candidates, split across stages by upper bound (each stage gets a few) and
+        scored in a single batch; it is capped at max_combinations and with a
+        shard set covers this shard only.  With 'random' rules every method
+        counts for a quarter of each token.  Once cancel_event is set, the next
+        token raises GenerationCancelled.
+        """
+        user_info = [item for sublist in user_data.values() for item in sublist]
+        user_info = self.sanitize_user_info(user_info)
+        stages = {}
+
+        def add(stage: str, upper_bound: float, population: List[Tuple[int, Callable[[int], str]]],
+                weight: float = 1.0):
+            entry = stages.setdefault(stage, {'upper_bound': 0, 'population': [], 'weight': weight})
+            entry['upper_bound'] += upper_bound
+            entry['population'].extend(population)
+
+        methods = RANDOM_METHODS if combination_method == 'random' else [combination_method]
+        for word in user_info:
+            self.check_cancelled()
+            if combination_method == 'custom':
+                if custom_pattern:
+                    add('custom', 1, self._listed([self._apply_custom_pattern(word, custom_pattern)]))
+                continue
+            counts = []
+            for method in methods:
+                plan = load_plan(method)
+                counts.append(sum(plan.count(word).values()))
+                add(combination_method, 0, self._plan_population(plan, word), 1 / len(methods))
+            stages[combination_method]['upper_bound'] += max(counts)
+
+        self.check_cancelled()
+        valid_info = [word for word in user_info if word]
+        pattern_count = sum(103 + sum(1 for char in 'aeios' if char in word.lower()) for word in valid_info)
+        pattern_count += 3 * len(valid_info) * (len(valid_info) - 1) // 2
+        add('patterns', pattern_count, self._listed(self.generate_patterns(valid_info)))
+        pair_count = 6 * len(user_info) * (len(user_info) - 1) // 2
+        add('cross_word', pair_count, self._listed(self._iter_cross_word(user_info)))
+        transformation_count = 4 * sum(1 for word in user_info if len(word) >= 3)
+        add('transformations', transformation_count, self._listed(self._iter_transformations(user_info)))
+
+        floor = max(1, sample_size // (4 * len(stages)))
+        total_upper = sum(entry['upper_bound'] for entry in stages.values()) or 1
+        samples = {}
+        for stage, entry in stages.items():
+            sizes = [size for size, _ in entry['population']]
+            offsets = list(accumulate(sizes))
+            share = floor + (sample_size - floor * len(stages)) * entry['upper_bound'] // total_upper
+            positions = sorted(random.Random(stage).sample(range(sum(sizes)), min(sum(sizes), share)))
+            samples[stage] = []
+            for position in positions:
+                part = bisect_right(offsets, position)
+                samples[stage].append(entry['population'][part][1](position - offsets[part] + sizes[part]))
+
+        eligible = dict.fromkeys(candidate for sample in samples.values() for candidate in sample
+                                 if len(candidate) >= min_length)
+        strong = set(self.scorer.filter_strong(list(eligible)))
+        shard_count = self.shard[1] if self.shard else 1
+        report = {}
+        for stage, entry in stages.items():
+            sample = samples[stage]
+            passed = sum(1 for candidate in sample if candidate in strong)
+            population = sum(size for size, _ in entry['population']) * entry['weight']
+            estimated = population * passed / len(sample) if sample else 0
+            report[stage] = {'upper_bound': entry['upper_bound'], 'estimated': int(round(estimated / shard_count))}
+        if use_ml and self.model and user_info:
+            report['ml'] = {'upper_bound': self.ml_samples, 'estimated': int(round(self.ml_samples / shard_count))}
+        return {
+            'upper_bound': sum(entry['upper_bound'] for entry in report.values()),
+            'estimated': min(sum(entry['estimated'] for entry in report.values()), max_combinations),
+            'stages': report
+        }
+
+    def save_to_file(self, password_list: Iterable[str], file_name: str, compress: bool = False,
+                     codec: str = None, level: int = None, threads: int = None,
+                     flush_interval: float = None) -> int:
+        """Write passwords one per line; returns how many were written.
+
+        codec is one of none/gzip/bz2/xz (compress=True means gzip) and adds the
+        matching extension to file_name; '-' streams to stdout and stops quietly
+        when the consumer closes the pipe. flush_interval makes partial blocks
+        reach the file periodically, for readers following it while it grows.
+        """
+        filtered_passwords = (pwd for pwd in password_list if "<SPORTS_TEAM/HOBBY>" not in pwd)
+        codec = codec or ('gzip' if compress else 'none')
+        writer = None
+        with self.profiler.timed('write', inputs=['strength']) as record:
+            try:
+                writer = BlockWriter(file_name, codec, level, threads, flush_interval=flush_interval)
+                with writer:
+                    writer.write_lines(filtered_passwords)
+            except BrokenPipeError:
+                logging.info(f"Output stream closed by the consumer after {writer.written} passwords")
+            except IOError as e:
+                logging.error(f"Error saving file {file_name}: {e}")
+            record['out'] = writer.written if writer is not None else 0
+        return record['out']
 
     def is_strong_password(self, password: str) -> bool:
-        result = zxcvbn(password)
-        return result['score'] >= 3
+        return self.scorer.is_strong(password)
+
+    def close(self):
+        self.scorer.close()
+
@@ -1,8 +1,17 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QTextEdit, QFileDialog, QCheckBox, QLineEdit, QMessageBox, QDialog, QSizePolicy, QComboBox
-from PyQt5.QtCore import Qt
+import time
+import argparse
+import threading
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QTextEdit, QFileDialog, QCheckBox, QLineEdit, QMessageBox, QDialog, QSizePolicy, QComboBox, QProgressBar, QListView
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
-from generator import DictionaryGenerator
+from generator import DictionaryGenerator, GenerationCancelled
+from preview import LineListModel
+from dataset_store import sync_datasets
+from profiling import MethodStats, StageProfiler
+from rules import builtin_rule_sets
+from writer import output_path
+from main import build_parser, generator_options
 import logging
 from translations import TRANSLATIONS
 
@@ -30,13 +39,133 @@ class HelpDialog(QDialog):
         layout.addWidget(help_content)
         self.setLayout(layout)
 
+class GenerationWorker(QObject):
+    """Runs dataset sync, model loading, generation, scoring and saving off the UI thread.
+
+    Generator settings (score cache, dataset cache, workers...) are the CLI's.
+    Progress goes back to the window through signals; cancel() may be called
+    from the UI thread and stops the run at the next dataset, estimated token
+    or candidate.
+    """
+    stageChanged = pyqtSignal(str)
+    progress = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    PROGRESS_INTERVAL = 0.2
+    PREVIEW_FLUSH_INTERVAL = 0.5
+
+    def __init__(self, params: dict, settings: argparse.Namespace):
+        super().__init__()
+        self.params = params
+        self.settings = settings
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _observe(self, passwords, profiler: StageProfiler):
+        total = self.params['max_combinations']
+        found = 0
+        last_emit = 0.0
+        for password in passwords:
+            found += 1
+            now = time.monotonic()
+            if now - last_emit >= self.PROGRESS_INTERVAL:
+                last_emit = now
+                self._emit_progress(profiler, found, total)
+            yield password
+        self._emit_progress(profiler, found, total)
+
+    def _emit_progress(self, profiler: StageProfiler, found: int, total: int):
+        stages = profiler.stages
+        self.progress.emit({
+            'strong': found,
+            'total': total,
+            'expanded': stages['expand']['out'] if 'expand' in stages else 0,
+            'unique': stages['dedupe']['out'] if 'dedupe' in stages else 0
+        })
+
+    def run(self):
+        params = self.params
+        generator = None
+        try:
+            report = {}
+            if params['sync'] and params['datasets']:
+                self.stageChanged.emit('sync')
+                for source in params['datasets']:
+                    self.check_cancelled()
+                    report.update(sync_datasets([source], self.settings.dataset_cache))
+
+            self.check_cancelled()
+            self.stageChanged.emit('load')
+            # counting only: the progress report needs stage counts, not timings
+            profiler = StageProfiler(timing=False)
+            generator = DictionaryGenerator(base_datasets=params['datasets'], profiler=profiler,
+                                            cancel_event=self.cancel_event, **generator_options(self.settings))
+            self.check_cancelled()
+
+            if params['estimate']:
+                self.stageChanged.emit('estimate')
+                estimate = generator.estimate_size(params['user_data'], params['max_combinations'],
+                                                   combination_method=params['combination_method'],
+                                                   custom_pattern=params['custom_pattern'],
+                                                   min_length=params['min_length'])
+                self.check_cancelled()
+                self.finished.emit({'sync': report, 'estimate': estimate})
+                return
+
+            if params['use_ml']:
+                self.stageChanged.emit('model')
+                generator.load_or_train_model(streaming=self.settings.stream_training)
+                self.check_cancelled()
+
+            self.stageChanged.emit('generate')
+            stats = MethodStats() if params['method_stats'] else None
+            passwords = generator.iter_personalized(
+                user_data=params['user_data'],
+                max_combinations=params['max_combinations'],
+                use_ml=params['use_ml'],
+                combination_method=params['combination_method'],
+                custom_pattern=params['custom_pattern'],
+                min_length=params['min_length'],
+                stats=stats
+            )
+            # plain output is flushed periodically so the preview can follow it
+            saved = generator.save_to_file(self._observe(passwords, profiler), params['output_file'],
+                                           compress=params['compress'],
+                                           flush_interval=None if params['compress'] else self.PREVIEW_FLUSH_INTERVAL)
+            self.finished.emit({
+                'sync': report,
+                'saved': saved,
+                'output_file': output_path(params['output_file'], 'gzip' if params['compress'] else 'none'),
+                'method_stats': stats.report() if stats is not None else None
+            })
+        except GenerationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            logging.error(f"Error generating passwords: {e}")
+            self.failed.emit(str(e))
+        finally:
+            if generator is not None:
+                generator.close()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise GenerationCancelled()
+
+
 class PasswordGeneratorGUI(QMainWindow):
     VERSION = "v1.5 Beta"
     
-    def __init__(self):
+    def __init__(self, settings: argparse.Namespace = None):
         super().__init__()
+        self.settings = settings or build_parser().parse_args([])
         self.current_language = 'en'
         self.translations = TRANSLATIONS
+        self.workerThread = None
+        self.worker = None
         self.initUI()
         self.add_version_label()
 
@@ -55,7 +184,7 @@ class PasswordGeneratorGUI(QMainWindow):
                 font-weight: bold;
                 font-size: 12px;
             }
-            QTextEdit, QLineEdit {
+            QTextEdit, QLineEdit, QListView {
                 background-color: #000000;
                 border: 1px solid #00ff00;
                 color: #00ff00;
@@ -197,12 +326,18 @@ Just type any information you know:
         self.verboseCheckBox = QCheckBox(self.tr(self.current_language, 'verbose'))
         layout.addWidget(self.verboseCheckBox)
 
+        self.methodStatsCheckBox = QCheckBox(self.tr(self.current_language, 'method_stats'))
+        layout.addWidget(self.methodStatsCheckBox)
+
         self.combinationLabel = QLabel(self.tr(self.current_language, 'combination_label'))
         layout.addWidget(self.combinationLabel)
 
         self.combinationSelect = QComboBox()
         for key, value in self.translations[self.current_language]['combination_options'].items():
             self.combinationSelect.addItem(value, key)
+        for name in builtin_rule_sets():
+            if name not in self.translations[self.current_language]['combination_options']:
+                self.combinationSelect.addItem(name, name)
         layout.addWidget(self.combinationSelect)
 
         self.patternLabel = QLabel(self.tr(self.current_language, 'pattern_label'))
@@ -216,9 +351,24 @@ Just type any information you know:
 
         self.combinationSelect.currentIndexChanged.connect(self.onCombinationMethodChanged)
 
+        run_buttons = QHBoxLayout()
         self.generateButton = QPushButton(self.tr(self.current_language, 'generate_button'))
         self.generateButton.clicked.connect(self.generatePasswords)
-        layout.addWidget(self.generateButton)
+        run_buttons.addWidget(self.generateButton)
+
+        self.cancelButton = QPushButton(self.tr(self.current_language, 'cancel_button'))
+        self.cancelButton.clicked.connect(self.cancelGeneration)
+        self.cancelButton.setEnabled(False)
+        run_buttons.addWidget(self.cancelButton)
+        layout.addLayout(run_buttons)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setTextVisible(True)
+        self.progressBar.hide()
+        layout.addWidget(self.progressBar)
+
+        self.statusLabel = QLabel('')
+        layout.addWidget(self.statusLabel)
 
         self.outputLabel = QLabel(self.tr(self.current_language, 'output_label'))
         layout.addWidget(self.outputLabel)
@@ -227,6 +377,42 @@ Just type any information you know:
         self.outputDisplay.setReadOnly(True)
         layout.addWidget(self.outputDisplay)
 
+        self.previewLabel = QLabel(self.tr(self.current_language, 'preview_label'))
+        layout.addWidget(self.previewLabel)
+
+        preview_controls = QHBoxLayout()
+        self.previewFilterInput = QLineEdit()
+        self.previewFilterInput.setPlaceholderText(self.tr(self.current_language, 'preview_filter'))
+        preview_controls.addWidget(self.previewFilterInput)
+
+        self.previewSearchInput = QLineEdit()
+        self.previewSearchInput.setPlaceholderText(self.tr(self.current_language, 'preview_search'))
+        self.previewSearchInput.returnPressed.connect(self.findInPreview)
+        preview_controls.addWidget(self.previewSearchInput)
+
+        self.findButton = QPushButton(self.tr(self.current_language, 'find_next'))
+        self.findButton.clicked.connect(self.findInPreview)
+        preview_controls.addWidget(self.findButton)
+        layout.addLayout(preview_controls)
+
+        self.previewModel = LineListModel(self)
+        self.previewView = QListView()
+        self.previewView.setUniformItemSizes(True)
+        self.previewView.setModel(self.previewModel)
+        layout.addWidget(self.previewView)
+
+        self.previewStatusLabel = QLabel('')
+        layout.addWidget(self.previewStatusLabel)
+        self.previewModel.rowsInserted.connect(self.updatePreviewStatus)
+        self.previewModel.modelReset.connect(self.updatePreviewStatus)
+
+        # filter once typing pauses instead of rescanning on every keystroke
+        self.previewFilterTimer = QTimer(self)
+        self.previewFilterTimer.setSingleShot(True)
+        self.previewFilterTimer.setInterval(300)
+        self.previewFilterTimer.timeout.connect(lambda: self.previewModel.set_filter(self.previewFilterInput.text()))
+        self.previewFilterInput.textChanged.connect(self.previewFilterTimer.start)
+
         footer = QLabel(self.tr(self.current_language, 'footer'))
         footer.setAlignment(Qt.AlignCenter)
         layout.addWidget(footer)
@@ -259,80 +445,156 @@ Just type any information you know:
             self.datasetInput.setText(';'.join(files))
 
     def generatePasswords(self):
-        if not self.validateInputs():
+        if self.workerThread is not None or not self.validateInputs():
             return
-            
-        try:
-            self.outputDisplay.clear()
-            self.outputDisplay.append("Starting password generation process...")
-            QApplication.processEvents()
-
-            if not self.validateInputs():
-                return
-
-            user_data = self.userDataInput.toPlainText()
-            datasets = [ds.strip() for ds in self.datasetInput.text().split(';') if ds.strip()]
-            max_combinations = int(self.maxInput.text())
-            use_ml = self.useMLCheckBox.isChecked()
-            compress_output = self.compressCheckBox.isChecked()
-            output_file = self.outputFileInput.text()
-            min_length = int(self.minLengthInput.text())
 
-            combination_method = self.combinationSelect.currentData()
-            custom_pattern = self.patternInput.text() if combination_method == 'custom' else ''
+        user_data = self.process_user_input(self.userDataInput.toPlainText())
+        if not user_data:
+            QMessageBox.warning(self, "Warning", "No valid user data provided.")
+            return
 
-            if self.estimateSizeCheckBox.isChecked():
-                self.estimatePasswordListSize(user_data, max_combinations)
-                return
+        combination_method = self.combinationSelect.currentData()
+        params = {
+            'user_data': user_data,
+            'datasets': [ds.strip() for ds in self.datasetInput.text().split(';') if ds.strip()],
+            'max_combinations': int(self.maxInput.text()),
+            'use_ml': self.useMLCheckBox.isChecked(),
+            'compress': self.compressCheckBox.isChecked(),
+            'output_file': self.outputFileInput.text(),
+            'min_length': int(self.minLengthInput.text()),
+            'combination_method': combination_method,
+            'custom_pattern': self.patternInput.text() if combination_method == 'custom' else '',
+            'estimate': self.estimateSizeCheckBox.isChecked(),
+            'sync': self.syncCheckBox.isChecked(),
+            'method_stats': self.methodStatsCheckBox.isChecked()
+        }
+
+        self.outputDisplay.clear()
+        self.previewModel.clear()
+        self.outputDisplay.append("Starting password generation process...")
+        self.progressBar.setRange(0, 0)
+        self.progressBar.show()
+        self.generateButton.setEnabled(False)
+        self.cancelButton.setEnabled(True)
+
+        self.workerThread = QThread(self)
+        self.worker = GenerationWorker(params, self.settings)
+        self.worker.moveToThread(self.workerThread)
+        self.workerThread.started.connect(self.worker.run)
+        self.worker.stageChanged.connect(self.onStageChanged)
+        self.worker.progress.connect(self.onProgress)
+        self.worker.finished.connect(self.onGenerationFinished)
+        self.worker.failed.connect(self.onGenerationFailed)
+        self.worker.cancelled.connect(self.onGenerationCancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.workerThread.quit)
+        self.workerThread.finished.connect(self.onWorkerStopped)
+        self.workerThread.start()
+
+    def cancelGeneration(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancelButton.setEnabled(False)
+            self.statusLabel.setText(self.tr(self.current_language, 'cancelling'))
+
+    def onStageChanged(self, stage: str):
+        message = self.tr(self.current_language, f'stage_{stage}')
+        self.statusLabel.setText(message)
+        self.outputDisplay.append(message)
+        if stage == 'generate':
+            self.progressBar.setRange(0, self.worker.params['max_combinations'])
+            self.progressBar.setValue(0)
+
+    def onProgress(self, progress: dict):
+        self.progressBar.setValue(min(progress['strong'], progress['total']))
+        if not self.worker.params['compress']:
+            # the writer has truncated the file by the first progress report, so following it is safe
+            if self.previewModel.source is None:
+                self.openPreview(self.worker.params['output_file'])
+            else:
+                self.previewModel.refresh()
+        if not self.worker.cancel_event.is_set():
+            self.statusLabel.setText(self.tr(self.current_language, 'progress_detail').format(**progress))
+
+    def onGenerationFinished(self, result: dict):
+        for source, entry in result['sync'].items():
+            self.outputDisplay.append(f"{source}: {entry['status']}, {entry['stats']['lines']:,} lines")
+        if 'estimate' in result:
+            self.showEstimate(result['estimate'])
+            return
 
-            self.outputDisplay.append("Initializing password generator...")
-            QApplication.processEvents()
-            
-            generator = DictionaryGenerator(base_datasets=datasets)
-            
-            if use_ml:
-                self.outputDisplay.append("Loading/training ML model...")
-                QApplication.processEvents()
-                generator.load_or_train_model()
-
-            user_data_dict = self.process_user_input(user_data)
-            if not user_data_dict:
-                QMessageBox.warning(self, "Warning", "No valid user data provided.")
-                return
+        if result['saved']:
+            self.outputDisplay.append(f"Generated {result['saved']} passwords.")
+            self.outputDisplay.append(f"\nAll passwords saved to: {result['output_file']}")
+            self.openPreview(result['output_file'])
+            if result['method_stats'] is not None:
+                self.showMethodStats(result['method_stats'])
+        else:
+            self.outputDisplay.append("No passwords were generated.")
 
-            self.outputDisplay.append("Generating passwords...")
-            QApplication.processEvents()
-            
-            passwords = generator.generate_personalized_list(
-                user_data=user_data_dict,
-                max_combinations=max_combinations,
-                use_ml=use_ml,
-                combination_method=combination_method,
-                custom_pattern=custom_pattern,
-                min_length=min_length
-            )
+    def openPreview(self, path: str):
+        try:
+            self.previewModel.open(path)
+        except OSError as e:
+            logging.error(f"Error opening {path} for preview: {e}")
 
-            if passwords:
-                generator.save_to_file(passwords, output_file, compress=compress_output)
-                self.outputDisplay.clear()
-                self.outputDisplay.append(f"Generated {len(passwords)} passwords.")
-                self.outputDisplay.append("\nSample passwords:")
-                for pwd in passwords[:10]:
-                    self.outputDisplay.append(pwd)
-                self.outputDisplay.append(f"\nAll passwords saved to: {output_file}")
-                
-                if compress_output:
-                    self.outputDisplay.append(f"File has been compressed as: {output_file}.gz")
-            else:
-                self.outputDisplay.append("No passwords were generated.")
+    def updatePreviewStatus(self, *args):
+        self.previewStatusLabel.setText(self.tr(self.current_language, 'preview_status').format(
+            rows=self.previewModel.rowCount(), lines=self.previewModel.indexed_lines()))
 
-        except Exception as e:
-            logging.error(f"Error generating passwords: {e}")
-            QMessageBox.critical(
-                self,
-                self.tr(self.current_language, 'error_title'),
-                f"{self.tr(self.current_language, 'error_message')} {str(e)}"
-            )
+    def findInPreview(self):
+        text = self.previewSearchInput.text()
+        if not text:
+            return
+        current = self.previewView.currentIndex()
+        row = self.previewModel.find(text, current.row() if current.isValid() else -1)
+        if row < 0 and current.isValid():
+            row = self.previewModel.find(text)
+        if row < 0:
+            self.previewStatusLabel.setText(self.tr(self.current_language, 'preview_not_found').format(text=text))
+            return
+        index = self.previewModel.index(row)
+        self.previewView.setCurrentIndex(index)
+        self.previewView.scrollTo(index, QListView.PositionAtCenter)
+
+    def onGenerationFailed(self, error: str):
+        QMessageBox.critical(
+            self,
+            self.tr(self.current_language, 'error_title'),
+            f"{self.tr(self.current_language, 'error_message')} {error}"
+        )
+
+    def onGenerationCancelled(self):
+        self.outputDisplay.append(self.tr(self.current_language, 'generation_cancelled'))
+
+    def onWorkerStopped(self):
+        self.worker.deleteLater()
+        self.workerThread.deleteLater()
+        self.worker = None
+        self.workerThread = None
+        self.progressBar.hide()
+        self.statusLabel.setText('')
+        self.generateButton.setEnabled(True)
+        self.cancelButton.setEnabled(False)
+
+    def closeEvent(self, event):
+        if self.workerThread is not None:
+            self.worker.cancel()
+            self.workerThread.quit()
+            self.workerThread.wait()
+        self.previewModel.clear()
+        super().closeEvent(event)
+
+    def showMethodStats(self, report: dict):
+        self.outputDisplay.append("\nCandidate yield per method:")
+        for method, row in report['methods'].items():
+            self.outputDisplay.append(f"{method}: produced {row['produced']:,}, unique {row['unique']:,}, "
+                                      f"length ok {row['length_passed']:,}, strong {row['strength_passed']:,} "
+                                      f"({row['yield']:.1%}), {row['seconds']:.3f}s")
+        for row in report['tokens']:
+            if row['token']:
+                self.outputDisplay.append(f"  {row['method']} / {row['token']}: produced {row['produced']:,}, "
+                                          f"strong {row['strength_passed']:,} ({row['yield']:.1%})")
 
     def validateInputs(self) -> bool:
         try:
@@ -372,23 +634,14 @@ Just type any information you know:
             QMessageBox.critical(self, "Error", f"Validation error: {str(e)}")
             return False
 
-    def estimatePasswordListSize(self, user_data: str, max_combinations: int):
-        try:
-            user_data_dict = self.process_user_input(user_data)
-            if not user_data_dict:
-                QMessageBox.warning(self, "Warning", "No valid user data provided for estimation.")
-                return
+    def showEstimate(self, estimate: dict):
+        for stage, entry in estimate['stages'].items():
+            self.outputDisplay.append(f"{stage}: upper bound {entry['upper_bound']:,}, estimated {entry['estimated']:,}")
+        self.outputDisplay.append(f"\nUpper bound before dedupe and filtering: {estimate['upper_bound']:,} candidates")
+        self.outputDisplay.append(f"Estimated password list size: {estimate['estimated']:,} passwords")
 
-            generator = DictionaryGenerator()
-            estimated_size = generator.estimate_size(user_data_dict, max_combinations)
-            
-            self.outputDisplay.clear()
-            self.outputDisplay.append(f"Estimated password list size: {estimated_size:,} passwords")
-            
-            if estimated_size > 1000000:
-                self.outputDisplay.append("\nWarning: Large password list may require significant time and resources.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to estimate size: {str(e)}")
+        if estimate['upper_bound'] > 1000000:
+            self.outputDisplay.append("\nWarning: Large password list may require significant time and resources.")
 
     def showHelp(self):
         help_dialog = HelpDialog(self, self.tr(self.current_language, 'help_text'))
@@ -409,11 +662,17 @@ Just type any information you know:
         self.compressCheckBox.setText(self.tr(self.current_language, 'compress_output'))
         self.estimateSizeCheckBox.setText(self.tr(self.current_language, 'estimate_size'))
         self.generateButton.setText(self.tr(self.current_language, 'generate_button'))
+        self.cancelButton.setText(self.tr(self.current_language, 'cancel_button'))
         self.outputLabel.setText(self.tr(self.current_language, 'output_label'))
+        self.previewLabel.setText(self.tr(self.current_language, 'preview_label'))
+        self.previewFilterInput.setPlaceholderText(self.tr(self.current_language, 'preview_filter'))
+        self.previewSearchInput.setPlaceholderText(self.tr(self.current_language, 'preview_search'))
+        self.findButton.setText(self.tr(self.current_language, 'find_next'))
         self.helpButton.setText(self.tr(self.current_language, 'help_button'))
         self.outputFileLabel.setText(self.tr(self.current_language, 'output_file_label'))
         self.syncCheckBox.setText(self.tr(self.current_language, 'sync'))
         self.verboseCheckBox.setText(self.tr(self.current_language, 'verbose'))
+        self.methodStatsCheckBox.setText(self.tr(self.current_language, 'method_stats'))
         self.combinationLabel.setText(self.tr(self.current_language, 'combination_label'))
         self.patternLabel.setText(self.tr(self.current_language, 'pattern_label'))
         self.patternInput.setPlaceholderText(self.tr(self.current_language, 'pattern_placeholder'))
@@ -483,9 +742,9 @@ Just type any information you know:
             self.patternLabel.hide()
             self.patternInput.hide()
 
-def main():
+def main(settings: argparse.Namespace = None):
     app = QApplication(sys.argv)
-    gui = PasswordGeneratorGUI()
+    gui = PasswordGeneratorGUI(settings)
     gui.show()
     sys.exit(app.exec_())
 
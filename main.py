@@ -2,9 +2,14 @@ import argparse
 import json
 import logging
 import re
+import sys
 from colorama import Fore, Back, Style
 from generator import DictionaryGenerator
-from typing import Dict, List
+from dataset_store import sync_datasets
+from rules import load_plan
+from writer import output_path
+from profiling import MethodStats, StageProfiler
+from typing import Dict, List, Tuple
 
 def display_banner():
     banner = f"""
@@ -66,9 +71,13 @@ def process_user_input(input_data: str) -> Dict[str, List[str]]:
         logging.error(f"Error processing input: {e}")
         return {}
 
-def main():
-    display_banner()
+def parse_shard(value: str) -> Tuple[int, int]:
+    match = re.match(r'^(\d+)/(\d+)$', value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected i/N with 1 <= i <= N")
+    return int(match.group(1)) - 1, int(match.group(2))
 
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="""
 This tool generates a personalized password list by combining:
 1. User-provided data (name, birthdate, etc.).
@@ -81,24 +90,78 @@ python main.py --datasets dataset1.txt dataset2.txt --user-data '{"name":["John"
     """, formatter_class=argparse.RawDescriptionHelpFormatter)
 
     parser.add_argument("--datasets", nargs='+', help="Paths to base dataset files.")
-    parser.add_argument("--output", default="generated_passwords.txt", help="Output file for generated passwords.")
+    parser.add_argument("--dataset-cache", type=str, default=".dataset_cache", help="Directory holding compiled, memory-mapped copies of the datasets.")
+    parser.add_argument("--output", default="generated_passwords.txt", help="Output file for generated passwords, or '-' to stream them to stdout.")
     parser.add_argument("--max", type=int, default=100000, help="Maximum number of generated passwords.")
     parser.add_argument("--user-data", type=str, default='',
                        help='Comma-separated or newline-separated list of personal information. Types will be detected automatically.')
     parser.add_argument("--compress", action="store_true", help="Compress the output file using gzip.")
+    parser.add_argument("--codec", choices=['none', 'gzip', 'bz2', 'xz'], default=None, help="Output codec (default: gzip with --compress, otherwise none); adds the matching extension.")
+    parser.add_argument("--compress-level", type=int, default=None, help="Compression level of the output codec (default: 6 for gzip and xz, 9 for bz2).")
+    parser.add_argument("--writer-threads", type=int, default=None, help="Threads compressing output blocks in parallel (default: all CPU cores).")
     parser.add_argument("--estimate-size", action="store_true", help="Estimate the size of the generated password list without creating it.")
     parser.add_argument("--verbose", action="store_true", help="Increase logging level to DEBUG.")
+    parser.add_argument("--method-stats", action="store_true", help="Print per combination method and per token counts (produced, unique, length-passed, strength-passed) and expansion time.")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage wall time, candidate counts, drop ratios and peak memory after the run.")
+    parser.add_argument("--profile-json", type=str, default=None, help="Write the per-stage profile as a JSON trace to this file (implies --profile).")
     parser.add_argument("--use-ml", action="store_true", help="Use machine learning for password generation.")
     parser.add_argument("--sync", action="store_true", help="Sync the datasets before generating passwords.")
     parser.add_argument("--gui", action="store_true", help="Launch the graphical user interface.")
     parser.add_argument("--min-length", type=int, default=6, help="Minimum length for generated passwords.")
     parser.add_argument("--model-path", type=str, default="password_model.keras", help="Path to the Keras model file.")
+    parser.add_argument("--stream-training", action="store_true", help="Train the ML model by streaming the dataset files (their deduplicated stores with --dataset-cache) instead of loading them into memory.")
+    parser.add_argument("--ml-samples", type=int, default=10, help="Number of passwords sampled from the ML model.")
+    parser.add_argument("--rules", type=str, default="basic", help="Rule set used to expand each user token: a built-in name (basic, advanced, complex, l33t), 'random', or the path to a rule file.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the random combination method, custom placeholders and ML sampling.")
+    parser.add_argument("--shard", type=parse_shard, default=None, help="Generate only shard i of N (e.g. 2/4); candidates are assigned to shards by a stable hash.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to expand user tokens in parallel.")
+    parser.add_argument("--dedupe-memory", type=int, default=512, help="Memory budget (MB) for deduplication before it spills to disk.")
+    parser.add_argument("--dedupe-mode", choices=['exact', 'bloom'], default='exact', help="Exact in-memory dedupe that spills sorted runs of 64-bit candidate digests to disk past the budget (a collision with a spilled digest, about n**2/2**65 likely over n candidates, drops a candidate), or a fixed-size Bloom filter.")
+    parser.add_argument("--bloom-fp-rate", type=float, default=0.001, help="Target false-positive rate of the Bloom dedupe mode.")
+    parser.add_argument("--score-workers", type=int, default=None, help="Number of processes used for password strength scoring (default: all CPU cores).")
+    parser.add_argument("--score-cache", type=str, default="score_cache.db", help="Path to the persistent strength score cache (an SQLite database).")
+    parser.add_argument("--score-cache-size", type=int, default=500000, help="Maximum number of entries kept in the strength score cache.")
+    parser.add_argument("--no-prefilter", action="store_true", help="Score every candidate with zxcvbn instead of rejecting plainly weak ones with the cheap pre-filter first.")
+    parser.add_argument("--prefilter-reject-bits", type=float, default=22.0, help="Stem entropy (bits) below which the pre-filter rejects a candidate.")
+    return parser
 
+def generator_options(args: argparse.Namespace) -> dict:
+    """DictionaryGenerator settings taken from the command line; the GUI uses the same ones."""
+    return {
+        'model_path': args.model_path,
+        'score_workers': args.score_workers,
+        'score_cache': args.score_cache,
+        'score_cache_size': args.score_cache_size,
+        'use_prefilter': not args.no_prefilter,
+        'prefilter_reject_bits': args.prefilter_reject_bits,
+        'ml_samples': args.ml_samples,
+        'dataset_cache': args.dataset_cache,
+        'dedupe_memory': args.dedupe_memory * 1024 * 1024,
+        'dedupe_mode': args.dedupe_mode,
+        'bloom_fp_rate': args.bloom_fp_rate,
+        'workers': args.workers,
+        'seed': args.seed,
+        'shard': args.shard
+    }
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
 
+    if args.output == '-':
+        # candidates own stdout; the banner, reports and Keras progress go to stderr
+        sys.stdout = sys.stderr
+    display_banner()
+
+    if args.rules != 'random':
+        try:
+            load_plan(args.rules)
+        except (IOError, ValueError) as e:
+            parser.error(f"--rules: {e}")
+
     if args.gui:
         from gui import main as gui_main
-        gui_main()
+        gui_main(args)
         return
 
     if args.verbose:
@@ -122,18 +185,29 @@ python main.py --datasets dataset1.txt dataset2.txt --user-data '{"name":["John"
 
     if args.sync:
         logging.info("Syncing datasets...")
+        try:
+            report = sync_datasets(args.datasets or [], args.dataset_cache)
+        except Exception as e:
+            logging.error(f"Failed to sync datasets: {e}")
+            exit(1)
+        for source, entry in report.items():
+            stats = entry['stats']
+            print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} {source}: {entry['status']}, "
+                  f"{stats['lines']:,} lines, {stats['unique']:,} unique")
         logging.info("Datasets synced successfully.")
 
+    profiler = StageProfiler(enabled=args.profile or bool(args.profile_json))
     logging.info("Initializing the password generator...")
     try:
-        generator = DictionaryGenerator(base_datasets=args.datasets, model_path=args.model_path)
+        generator = DictionaryGenerator(base_datasets=args.datasets, profiler=profiler, **generator_options(args))
     except Exception as e:
         logging.error(f"Failed to initialize the generator: {e}")
         exit(1)
 
     if args.use_ml:
         try:
-            generator.load_or_train_model()
+            with profiler.timed('ml_model'):
+                generator.load_or_train_model(streaming=args.stream_training)
         except Exception as e:
             logging.error(f"Failed to load or train the model: {e}")
             exit(1)
@@ -145,31 +219,66 @@ python main.py --datasets dataset1.txt dataset2.txt --user-data '{"name":["John"
 
     if args.estimate_size:
         try:
-            size = generator.estimate_size(user_data=user_data, max_combinations=args.max)
-            print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Estimated size of the generated password list: {size}")
-            logging.info(f"Estimated size of the generated password list: {size}")
+            estimate = generator.estimate_size(
+                user_data=user_data,
+                max_combinations=args.max,
+                use_ml=args.use_ml,
+                combination_method=args.rules,
+                min_length=args.min_length
+            )
+            for stage, entry in estimate['stages'].items():
+                print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} {stage}: upper bound {entry['upper_bound']:,}, "
+                      f"estimated {entry['estimated']:,}")
+            print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Upper bound before dedupe and filtering: {estimate['upper_bound']:,}")
+            print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Estimated size of the generated password list: {estimate['estimated']:,}")
+            logging.info(f"Estimated size of the generated password list: {estimate}")
         except Exception as e:
             logging.error(f"Failed to estimate the size of the password list: {e}")
+        generator.close()
         exit(0)
 
     logging.info("Generating password list...")
+    method_stats = MethodStats() if args.method_stats else None
     try:
-        password_list = generator.generate_personalized_list(
+        password_stream = generator.iter_personalized(
             user_data=user_data,
             max_combinations=args.max,
             use_ml=args.use_ml,
-            min_length=args.min_length
+            combination_method=args.rules,
+            min_length=args.min_length,
+            stats=method_stats
         )
+        saved = generator.save_to_file(password_stream, args.output, compress=args.compress, codec=args.codec,
+                                       level=args.compress_level, threads=args.writer_threads)
     except Exception as e:
-        logging.error(f"Failed to generate password list: {e}")
+        logging.error(f"Failed to generate the password list: {e}")
+        generator.close()
         exit(1)
 
-    try:
-        generator.save_to_file(password_list, args.output, compress=args.compress)
-        print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Password list saved to {args.output}")
-        logging.info(f"Password list saved to {args.output}")
-    except Exception as e:
-        logging.error(f"Failed to save the password list: {e}")
+    tiers = generator.scorer.tier_report()
+    print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Strength filter tiers: "
+          f"pre-filter rejected {tiers['prefilter_rejected']}, "
+          f"cache hits {tiers['cache']}, zxcvbn scored {tiers['zxcvbn']}")
+    output = output_path(args.output, args.codec or ('gzip' if args.compress else 'none'))
+    output = 'stdout' if output == '-' else output
+    print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} {saved} passwords saved to {output}")
+    logging.info(f"{saved} passwords saved to {output}")
+    if method_stats is not None:
+        report = method_stats.report()
+        print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Candidate yield per method and token:")
+        print(method_stats.format_table(report))
+        logging.info(f"Method stats: {report}")
+    if profiler.enabled:
+        report = profiler.report()
+        print(f"{Fore.GREEN}[INFO]{Style.RESET_ALL} Stage profile:")
+        print(profiler.format_table(report))
+        logging.info(f"Stage profile: {report}")
+        if args.profile_json:
+            try:
+                profiler.write_json(args.profile_json, report)
+            except IOError as e:
+                logging.error(f"Error writing profile {args.profile_json}: {e}")
+    generator.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,263 @@
+import os
+import bz2
+import gzip
+import lzma
+import tempfile
+import numpy as np
+from collections import OrderedDict
+from typing import Optional
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+SCAN_CHUNK = 1 << 20
+FETCH_ROWS = 2048
+PAGE_SIZE = 256
+MAX_PAGES = 64
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+class GrowableArray:
+    """int64 array with amortized appends."""
+
+    def __init__(self):
+        self._data = np.zeros(1024, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, position):
+        return self._data[:self._size][position]
+
+    def extend(self, values: np.ndarray):
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=np.int64)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+class LineSource:
+    """Bytes of a password file, read on demand.
+
+    Plain files are read in place and may still be growing. Compressed files
+    are decompressed into an anonymous spill file as far as they have been
+    scanned, so random access never needs the whole list in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        opener = COMPRESSED_OPENERS.get(os.path.splitext(path)[1])
+        self._reader = opener(path, 'rb') if opener else None
+        self._file = tempfile.TemporaryFile() if opener else open(path, 'rb')
+        self._spilled = 0
+
+    def size(self) -> int:
+        """Bytes readable right now; may shrink if a plain file is truncated."""
+        if self._reader is None:
+            return os.fstat(self._file.fileno()).st_size
+        return self._spilled
+
+    def has_more(self, offset: int) -> bool:
+        return offset < self.size() or (self._reader is not None and not self._reader.closed)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if self._reader is not None and offset + size > self._spilled and not self._reader.closed:
+            data = self._reader.read(max(size, SCAN_CHUNK))
+            if data:
+                self._file.seek(self._spilled)
+                self._file.write(data)
+                self._spilled += len(data)
+            else:
+                self._reader.close()
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+        self._file.close()
+
+
+class LineListModel(QAbstractListModel):
+    """Read-only list model over the lines of a (possibly growing or compressed) password file.
+
+    Only line start offsets are held in memory (8 bytes per line); the file is
+    indexed chunk by chunk as the view asks for more rows through fetchMore,
+    and lines are read back in cached pages when they are displayed. A filter
+    keeps the line numbers containing a substring, matched case-insensitively.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source: Optional[LineSource] = None
+        self._filter = ''
+        self._reset_index()
+
+    def _reset_index(self):
+        self._starts = GrowableArray()
+        self._scanned = 0
+        self._matches = GrowableArray() if self._filter else None
+        self._shown = 0
+        self._pages = OrderedDict()
+
+    def open(self, path: str):
+        source = LineSource(path)
+        self.beginResetModel()
+        self.close_source()
+        self.source = source
+        self._reset_index()
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def clear(self):
+        self.beginResetModel()
+        self.close_source()
+        self._reset_index()
+        self.endResetModel()
+
+    def close_source(self):
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self._filter = text.lower()
+        self._shown = 0
+        self._pages.clear()
+        if self._filter:
+            self._matches = GrowableArray()
+            self._filter_lines(0, len(self._starts))
+        else:
+            self._matches = None
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def refresh(self):
+        """Pick up lines appended to a growing file; starts over if the file was truncated."""
+        if self.source is None:
+            return
+        if self.source.size() < self._scanned:
+            self.beginResetModel()
+            self._reset_index()
+            self.endResetModel()
+        if self._shown < FETCH_ROWS and self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def indexed_lines(self) -> int:
+        return len(self._starts)
+
+    def _known_rows(self) -> int:
+        return len(self._matches) if self._matches is not None else len(self._starts)
+
+    def _line_number(self, row: int) -> int:
+        return int(self._matches[row]) if self._matches is not None else row
+
+    def _line_range(self, first: int, last: int):
+        start = int(self._starts[first])
+        end = int(self._starts[last + 1]) if last + 1 < len(self._starts) else self._scanned
+        return start, end
+
+    def _read_lines(self, first: int, last: int) -> list:
+        start, end = self._line_range(first, last)
+        return self.source.read_at(start, end - start).decode('utf-8', 'replace').split('\n')[:-1]
+
+    def _scan(self) -> bool:
+        """Index the next chunk of complete lines; returns False when nothing new is available."""
+        data = self.source.read_at(self._scanned, SCAN_CHUNK)
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return False
+        newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8, count=end) == 10)
+        first_line = len(self._starts)
+        self._starts.extend(self._scanned + np.concatenate(([0], newlines[:-1] + 1)))
+        self._scanned += end
+        if self._matches is not None:
+            self._filter_lines(first_line, len(self._starts))
+        return True
+
+    def _filter_lines(self, first: int, stop: int):
+        for chunk_first in range(first, stop, 65536):
+            chunk_stop = min(chunk_first + 65536, stop)
+            lines = self._read_lines(chunk_first, chunk_stop - 1)
+            matches = [chunk_first + i for i, line in enumerate(lines) if self._filter in line.lower()]
+            self._matches.extend(np.array(matches, dtype=np.int64))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._shown
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid() or self.source is None:
+            return False
+        return self._shown < self._known_rows() or self.source.has_more(self._scanned)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.source is None:
+            return
+        # a selective filter may need several chunks before it has rows to show
+        scans = 0
+        while self._known_rows() - self._shown < FETCH_ROWS and scans < 16 and self._scan():
+            scans += 1
+        count = min(FETCH_ROWS, self._known_rows() - self._shown)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+            self._shown += count
+            self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self._shown:
+            return None
+        line = self._line_number(index.row())
+        page = line // PAGE_SIZE
+        lines = self._pages.get(page)
+        if lines is None:
+            first = page * PAGE_SIZE
+            last = min(first + PAGE_SIZE, len(self._starts)) - 1
+            lines = self._read_lines(first, last)
+            if len(lines) == PAGE_SIZE:
+                self._pages[page] = lines
+                if len(self._pages) > MAX_PAGES:
+                    self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return lines[line - page * PAGE_SIZE]
+
+    def find(self, text: str, after_row: int = -1) -> int:
+        """Row of the next line after `after_row` containing `text` (case-insensitive), or -1.
+
+        Searches past the rows shown so far, indexing more of the file as needed.
+        """
+        needle = text.lower()
+        if not needle or self.source is None:
+            return -1
+        line = self._line_number(after_row) + 1 if after_row >= 0 else 0
+        while True:
+            if line >= len(self._starts) and not self._scan():
+                return -1
+            last = min(line + 65535, len(self._starts) - 1)
+            for offset, candidate in enumerate(self._read_lines(line, last)):
+                if needle not in candidate.lower():
+                    continue
+                row = self._row_of_line(line + offset)
+                if row is not None:
+                    return self._show(row)
+            line = last + 1
+
+    def _row_of_line(self, line: int) -> Optional[int]:
+        if self._matches is None:
+            return line
+        row = int(np.searchsorted(self._matches.values, line))
+        return row if row < len(self._matches) and self._matches[row] == line else None
+
+    def _show(self, row: int) -> int:
+        if row >= self._shown:
+            self.beginInsertRows(QModelIndex(), self._shown, row)
+            self._shown = row + 1
+            self.endInsertRows()
+        return row
@@ -0,0 +1,259 @@
+import sys
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageProfiler:
+    """Wall time, item counts and memory of the pipeline stages of one run.
+
+    The pipeline is lazy, so a stage's time is the time spent inside its
+    iterator, which includes pulling from its inputs; a stage's own time is
+    that minus the time of the stages named as its inputs, and its input count
+    is their combined output. Memory is the process's peak RSS when the stage
+    finished. A disabled profiler hands iterables back untouched; with timing
+    off, stages are only counted, which is cheap enough for progress reports.
+    """
+
+    def __init__(self, enabled: bool = True, timing: bool = True):
+        self.enabled = enabled
+        self.timing = timing
+        self.started = time.perf_counter()
+        self.stages: Dict[str, dict] = {}
+
+    def _record(self, name: str, inputs: Iterable[str]) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {'inputs': list(inputs), 'seconds': 0.0, 'in': None, 'out': 0, 'budget_cut': 0,
+                                 'peak_rss': None}
+        return self.stages[name]
+
+    def stage(self, name: str, iterable: Union[Iterable, Callable[[], Iterable]],
+              inputs: Iterable[str] = ()) -> Iterable:
+        """Time and count the items of `iterable`.
+
+        `iterable` may be a function returning one, so eager producers are timed
+        too; it is called on the first pull.
+        """
+        if not self.enabled:
+            return iterable() if callable(iterable) else iterable
+        if not self.timing:
+            return self._count_stage(self._record(name, inputs), iterable)
+        return self._iter_stage(self._record(name, inputs), iterable)
+
+    def _count_stage(self, record: dict, iterable) -> Iterator:
+        for item in (iterable() if callable(iterable) else iterable):
+            record['out'] += 1
+            yield item
+
+    def _iter_stage(self, record: dict, iterable) -> Iterator:
+        clock = time.perf_counter
+        start = clock()
+        iterator = iter(iterable() if callable(iterable) else iterable)
+        record['seconds'] += clock() - start
+        try:
+            while True:
+                start = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    record['seconds'] += clock() - start
+                record['out'] += 1
+                yield item
+        finally:
+            record['peak_rss'] = peak_rss()
+
+    @contextmanager
+    def timed(self, name: str, inputs: Iterable[str] = ()) -> Iterator[dict]:
+        """Time a block; the caller may set the yielded record's 'in' and 'out' counts."""
+        record = self._record(name, inputs)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] += time.perf_counter() - start
+            record['peak_rss'] = peak_rss()
+
+    def record_budget_cut(self, name: str, count: int):
+        """Note `count` items of stage `name` cut by the --max budget (passed, or never judged); they are not counted as dropped."""
+        if self.enabled and name in self.stages:
+            self.stages[name]['budget_cut'] += count
+
+    def _ordered_names(self) -> List[str]:
+        # data-flow order: every stage after the stages it reads from
+        pending = list(self.stages)
+        ordered = []
+        while pending:
+            ready = next((name for name in pending
+                          if all(source in ordered or source not in self.stages
+                                 for source in self.stages[name]['inputs'])), pending[0])
+            pending.remove(ready)
+            ordered.append(ready)
+        return ordered
+
+    def report(self) -> dict:
+        rows = []
+        for name in self._ordered_names():
+            record = self.stages[name]
+            upstream = [self.stages[source] for source in record['inputs'] if source in self.stages]
+            items_in = record['in'] if record['in'] is not None else (
+                sum(source['out'] for source in upstream) if record['inputs'] else None)
+            rows.append({
+                'stage': name,
+                'seconds': max(0.0, record['seconds'] - sum(source['seconds'] for source in upstream)),
+                'inclusive_seconds': record['seconds'],
+                'in': items_in,
+                'out': record['out'],
+                'budget_cut': record['budget_cut'],
+                'drop_ratio': 1 - (record['out'] + record['budget_cut']) / items_in if items_in else None,
+                'peak_rss': record['peak_rss']
+            })
+        by_name = {row['stage']: row for row in rows}
+
+        def drop(name):
+            return by_name[name]['drop_ratio'] if name in by_name else None
+
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'peak_rss': peak_rss(),
+            'duplicate_ratio': drop('dedupe'),
+            'length_reject_ratio': drop('length_filter'),
+            'strength_reject_ratio': drop('strength'),
+            'stages': rows
+        }
+
+    def format_table(self, report: Optional[dict] = None) -> str:
+        report = report or self.report()
+
+        def count(value):
+            return '-' if value is None else f"{value:,}"
+
+        def ratio(value):
+            return '-' if value is None else f"{value:.1%}"
+
+        def megabytes(value):
+            return '-' if value is None else f"{value / (1024 * 1024):.0f}MB"
+
+        lines = [f"{'stage':<24} {'self':>10} {'total':>10} {'in':>12} {'out':>12} {'dropped':>8} {'peak rss':>9}"]
+        for row in report['stages']:
+            lines.append(f"{row['stage']:<24} {row['seconds']:>9.3f}s {row['inclusive_seconds']:>9.3f}s "
+                         f"{count(row['in']):>12} {count(row['out']):>12} {ratio(row['drop_ratio']):>8} "
+                         f"{megabytes(row['peak_rss']):>9}")
+        lines.append(f"wall time {report['wall_seconds']:.3f}s, peak RSS {megabytes(report['peak_rss'])}, "
+                     f"duplicates {ratio(report['duplicate_ratio'])}, "
+                     f"too short {ratio(report['length_reject_ratio'])}, "
+                     f"strength rejected {ratio(report['strength_reject_ratio'])}, "
+                     f"cut by --max {sum(row['budget_cut'] for row in report['stages']):,}")
+        return '\n'.join(lines)
+
+    def write_json(self, path: str, report: Optional[dict] = None):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report or self.report(), file, indent=2)
+
+
+class MethodStats:
+    """Yield of every (combination method, token) pair through the pipeline.
+
+    `track` wraps the candidates of one pair, counting what it produced and the
+    time spent producing them; `count` wraps a later stage and credits each
+    candidate it lets through to the pair that produced it. Stages only drop
+    candidates and never reorder them, so every stage hands its (candidate, pair)
+    tags to the next in a queue; a stage's own output is matched by popping
+    the queue up to it, and the queue only holds candidates currently between
+    two stages. Pairs of the token-independent sources (patterns, cross_word,
+    ...) have an empty token. Stages pull in batches, so with a --max budget the
+    last few candidates produced may never reach the later stages.
+    """
+
+    FIELDS = ['produced', 'unique', 'length_passed', 'strength_passed']
+
+    def __init__(self):
+        self.entries: Dict[tuple, dict] = {}
+        self._queues: List[deque] = [deque()]
+
+    def _entry(self, key: tuple) -> dict:
+        if key not in self.entries:
+            self.entries[key] = dict({field: 0 for field in self.FIELDS}, seconds=0.0)
+        return self.entries[key]
+
+    def track(self, method: str, token: str, candidates: Union[Iterable[str], Callable[[], Iterable[str]]]) -> Iterator[str]:
+        key = (method, token)
+        entry = self._entry(key)
+        tags = self._queues[0]
+        clock = time.perf_counter
+        start = clock()
+        iterator = iter(candidates() if callable(candidates) else candidates)
+        entry['seconds'] += clock() - start
+        while True:
+            start = clock()
+            try:
+                candidate = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                entry['seconds'] += clock() - start
+            entry['produced'] += 1
+            tags.append((candidate, key))
+            yield candidate
+
+    def count(self, field: str, candidates: Iterable[str]) -> Iterator[str]:
+        """Credit `field` for each candidate of a stage fed by the tracked or previously counted stream."""
+        stage = len(self._queues) - 1
+        self._queues.append(deque())
+        return self._count(field, candidates, stage)
+
+    def _count(self, field: str, candidates: Iterable[str], stage: int) -> Iterator[str]:
+        entries, queues = self.entries, self._queues
+        tags, passed = queues[stage], queues[stage + 1]
+        for candidate in candidates:
+            tagged, key = tags.popleft()
+            while tagged != candidate:
+                tagged, key = tags.popleft()
+            entries[key][field] += 1
+            # only keep tags for a later stage if one was stacked on this one
+            if len(queues) > stage + 2:
+                passed.append((candidate, key))
+            yield candidate
+
+    def report(self) -> dict:
+        def summarize(row: dict) -> dict:
+            row['yield'] = row['strength_passed'] / row['produced'] if row['produced'] else 0.0
+            return row
+
+        tokens = [summarize(dict(entry, method=method, token=token))
+                  for (method, token), entry in self.entries.items()]
+        methods = {}
+        for row in tokens:
+            total = methods.setdefault(row['method'], dict({field: 0 for field in self.FIELDS}, seconds=0.0))
+            for field in self.FIELDS + ['seconds']:
+                total[field] += row[field]
+        return {'methods': {method: summarize(total) for method, total in methods.items()}, 'tokens': tokens}
+
+    def format_table(self, report: Optional[dict] = None) -> str:
+        report = report or self.report()
+        lines = [f"{'method':<16} {'token':<20} {'produced':>10} {'unique':>10} {'length ok':>10} "
+                 f"{'strong':>10} {'yield':>7} {'time':>9}"]
+        rows = [dict(row, token='(all)') for row in
+                (dict(total, method=method) for method, total in report['methods'].items())]
+        rows += [dict(row, token=row['token'] or '*') for row in report['tokens']]
+        for row in rows:
+            lines.append(f"{row['method']:<16} {row['token'][:20]:<20} {row['produced']:>10,} {row['unique']:>10,} "
+                         f"{row['length_passed']:>10,} {row['strength_passed']:>10,} {row['yield']:>7.1%} "
+                         f"{row['seconds']:>8.3f}s")
+        return '\n'.join(lines)
@@ -0,0 +1,453 @@
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import chain, combinations, product
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+CHUNK_SIZE = 4096
+
+CASE_OPS = {
+    ':': lambda value: value,
+    'l': str.lower,
+    'u': str.upper,
+    'c': str.capitalize,
+    'E': str.title,
+    'r': lambda value: value[::-1],
+}
+RANGE_PATTERN = re.compile(r'^(\d+)\.\.(\d+)$')
+SET_OP_PATTERN = re.compile(r'^([$^])\[(\w+)\]$')
+TABLE_OP_PATTERN = re.compile(r'^([SL])\[(\w+)\]$')
+
+
+def _length_histogram(values) -> Counter:
+    return Counter(len(str(value)) for value in values)
+
+
+def _length_product(*histograms: Counter) -> Counter:
+    result = Counter({0: 1})
+    for histogram in histograms:
+        combined = Counter()
+        for length, count in result.items():
+            for extra, extra_count in histogram.items():
+                combined[length + extra] += count * extra_count
+        result = combined
+    return result
+
+
+def _expand_values(tokens: List[str]) -> List[str]:
+    values = []
+    for token in tokens:
+        match = RANGE_PATTERN.match(token)
+        if match:
+            start, stop = match.groups()
+            width = len(start) if start.startswith('0') else 0
+            values.extend(str(number).zfill(width) for number in range(int(start), int(stop) + 1))
+        else:
+            values.append(token)
+    return values
+
+
+def substitution_slots(value: str, table: Dict[str, List[str]], per_character: bool) -> List[Tuple[List[int], List[str]]]:
+    """Places where `table` applies to `value`, as (positions, alternatives) slots.
+
+    per_character: every occurrence is its own slot offering all alternatives (l33t).
+    Otherwise all occurrences of a character form one slot offering its first
+    alternative, so they are always replaced together (complex).
+    """
+    if per_character:
+        return [([position], table[char]) for position, char in enumerate(value) if char in table]
+    positions = {}
+    for position, char in enumerate(value):
+        if char in table:
+            positions.setdefault(char, []).append(position)
+    return [(places, table[char][:1]) for char, places in positions.items()]
+
+
+def iter_substitutions(value: str, slots: List[Tuple[List[int], List[str]]],
+                       max_substitutions: int = 0, max_variants: int = 0) -> Iterator[str]:
+    """Lazily yield `value` with its slots substituted, fewest substitutions first.
+
+    A limit of 0 means unlimited. Variants are built one at a time from a
+    character list, so a capped long token costs only what it yields.
+    """
+    chars = list(value)
+    top = min(max_substitutions, len(slots)) if max_substitutions else len(slots)
+    emitted = 0
+    for size in range(top + 1):
+        for combo in combinations(slots, size):
+            for choice in product(*[alternatives for _, alternatives in combo]):
+                variant = chars[:]
+                for (positions, _), replacement in zip(combo, choice):
+                    for position in positions:
+                        variant[position] = replacement
+                yield ''.join(variant)
+                emitted += 1
+                if emitted == max_variants:
+                    return
+
+
+def substitution_lengths(value: str, slots: List[Tuple[List[int], List[str]]],
+                         max_substitutions: int = 0, max_variants: int = 0) -> Counter:
+    """Length histogram of iter_substitutions without building the strings."""
+    top = min(max_substitutions, len(slots)) if max_substitutions else len(slots)
+    deltas = [[len(positions) * (len(replacement) - 1) for replacement in alternatives]
+              for positions, alternatives in slots]
+    levels = [Counter({0: 1})]
+    for delta in map(Counter, deltas):
+        shifted = [_length_product(level, delta) for level in levels[:top]]
+        levels = [levels[0]] + [levels[k] + shifted[k - 1] if k < len(levels) else shifted[k - 1]
+                                for k in range(1, min(len(levels), top) + 1)]
+    total = Counter()
+    for level in levels:
+        total.update(level)
+    if not max_variants or sum(total.values()) <= max_variants:
+        return Counter({len(value) + delta: count for delta, count in total.items()})
+    lengths = Counter()
+    emitted = 0
+    for size in range(top + 1):
+        for combo in combinations(range(len(slots)), size):
+            for choice in product(*[deltas[index] for index in combo]):
+                lengths[len(value) + sum(choice)] += 1
+                emitted += 1
+                if emitted == max_variants:
+                    return lengths
+    return lengths
+
+
+class RuleOp:
+    """One step of a rule: maps a single value to a list of values.
+
+    `content_free` ops only need the input length to know their output lengths,
+    which lets plans be counted without expanding them.
+    """
+
+    def __init__(self, token: str, kind: str, arg=None, max_substitutions: int = 0, max_variants: int = 0):
+        self.token = token
+        self.kind = kind
+        self.arg = arg
+        self.content_free = kind not in ('S', 'L')
+        self.max_substitutions = max_substitutions
+        self.max_variants = max_variants
+        self.key = token if self.content_free else (token, max_substitutions, max_variants)
+        if kind in ('$', '^'):
+            self.histogram = _length_histogram(arg)
+        elif kind in ('$lit', '^lit'):
+            self.histogram = Counter({len(arg): 1})
+        else:
+            self.histogram = Counter({0: 1})
+
+    def apply(self, value: str) -> Iterable[str]:
+        kind, arg = self.kind, self.arg
+        if kind == 'case':
+            return [arg(value)]
+        if kind == '$':
+            return [value + item for item in arg]
+        if kind == '^':
+            return [item + value for item in arg]
+        if kind == '$lit':
+            return [value + arg]
+        if kind == '^lit':
+            return [arg + value]
+        return iter_substitutions(value, substitution_slots(value, arg, kind == 'L'),
+                                  self.max_substitutions, self.max_variants)
+
+    def output_lengths(self, value: str) -> Counter:
+        if self.content_free:
+            return Counter({len(value) + extra: count for extra, count in self.histogram.items()})
+        return substitution_lengths(value, substitution_slots(value, self.arg, self.kind == 'L'),
+                                    self.max_substitutions, self.max_variants)
+
+
+class RuleNode:
+    def __init__(self, op: Optional[RuleOp]):
+        self.op = op
+        self.children = {}
+        self.terminal = False
+        self.dynamic = False
+        self.signature = None
+
+
+class RulePlan:
+    """A rule file compiled into a trie, so rules sharing a prefix of ops share its work.
+
+    Expansion is depth-first per value: a node emits its value (when a rule ends
+    there) and then descends into its children in file order. Leaf ops build
+    their strings as one batch.  Counts are exact for the expansion as run, so a
+    skipped duplicate case branch is not counted either.
+    """
+
+    def __init__(self, rules: List[List[RuleOp]], suffixes: List[str], min_length: int, name: str = ''):
+        self.name = name
+        self.suffixes = suffixes
+        self.min_length = min_length
+        self.root = RuleNode(None)
+        for rule in rules:
+            node = self.root
+            for op in rule:
+                node = node.children.setdefault(op.key, RuleNode(op))
+            node.terminal = True
+        self._mark_dynamic(self.root)
+
+    def _mark_dynamic(self, node: RuleNode) -> Tuple:
+        below = False
+        for child in node.children.values():
+            self._mark_dynamic(child)
+            below |= child.dynamic or not child.op.content_free
+        node.dynamic = below
+        node.signature = (node.terminal,) + tuple((key, child.signature) for key, child in node.children.items())
+        return node.signature
+
+    def _is_repeat(self, node: RuleNode, child: RuleNode, value: str, cased: set) -> bool:
+        # sibling case ops that agree on a value (l/u/c of '1990') would expand
+        # identical subtrees; only nodes counted by value can tell, see _value_histogram
+        if child.op.kind != 'case' or not (node is self.root or node.dynamic):
+            return False
+        key = (child.op.arg(value), child.signature)
+        if key in cased:
+            return True
+        cased.add(key)
+        return False
+
+    def _walk(self, node: RuleNode, value: str, out: List[str]) -> Iterator[List[str]]:
+        cased = set()
+        for child in node.children.values():
+            if self._is_repeat(node, child, value, cased):
+                continue
+            results = child.op.apply(value)
+            if not child.children:
+                out.extend(results)
+            else:
+                for result in results:
+                    if child.terminal:
+                        out.append(result)
+                    yield from self._walk(child, result, out)
+            if len(out) >= CHUNK_SIZE:
+                yield out[:]
+                del out[:]
+
+    def iter_base_chunks(self, word: str) -> Iterator[List[str]]:
+        """Unguarded base candidates of `word`, in chunks."""
+        out = []
+        if self.root.terminal:
+            out.append(word)
+        yield from self._walk(self.root, word, out)
+        if out:
+            yield out
+
+    def _guard(self, chunk: List[str]) -> List[str]:
+        min_length = self.min_length
+        return [candidate for candidate in chunk if len(candidate) >= min_length]
+
+    def _contextual(self, chunk: List[str]) -> List[str]:
+        suffixes = self.suffixes
+        shortest = min(len(suffix) for suffix in suffixes)
+        safe = self.min_length - shortest
+        if all(len(base) >= safe for base in chunk):
+            return [base + suffix for base in chunk for suffix in suffixes]
+        return self._guard([base + suffix for base in chunk for suffix in suffixes])
+
+    def iter_candidate_chunks(self, word: str) -> Iterator[List[str]]:
+        """Guarded base candidates followed by the suffix pass, undeduplicated, in chunks.
+
+        Base chunks are kept for the suffix pass instead of expanding the plan twice.
+        """
+        base_chunks = []
+        for chunk in self.iter_base_chunks(word):
+            if self.suffixes:
+                base_chunks.append(chunk)
+            yield self._guard(chunk)
+        for chunk in base_chunks:
+            yield self._contextual(chunk)
+
+    def _colliding(self, bases: List[str]) -> set:
+        """Bases whose suffixed candidates may repeat another candidate of the same word."""
+        suffixes = self.suffixes
+        known = set(bases)
+        if '' in suffixes or len(set(suffixes)) < len(suffixes):
+            return known
+        # b + s repeats the base b + s itself, and b + s repeats b' + t when s
+        # ends with another suffix t and b' = b + s[:-len(t)]
+        overlaps = tuple({s[:-len(t)] for s in suffixes for t in suffixes if len(t) < len(s) and s.endswith(t)})
+        stems = tuple(suffixes) + overlaps
+        suspects = set()
+        for base in bases:
+            if base.endswith(stems):
+                for stem in suffixes:
+                    if base.endswith(stem) and base[:-len(stem)] in known:
+                        suspects.add(base[:-len(stem)])
+                for stem in overlaps:
+                    if base.endswith(stem) and base[:-len(stem)] in known:
+                        suspects.update((base, base[:-len(stem)]))
+        return suspects
+
+    def iter_unique_chunks(self, word: str) -> Iterator[List[str]]:
+        """iter_candidate_chunks with each candidate once, in order of first appearance.
+
+        Only the suffixed candidates of bases found by _colliding go through a
+        set; the rest cannot repeat, which spares hashing every candidate.
+        """
+        bases = list(dict.fromkeys(chain.from_iterable(self.iter_base_chunks(word))))
+        guarded = self._guard(bases)
+        yield guarded
+        if not self.suffixes:
+            return
+        suspects = self._colliding(bases)
+        seen = set(guarded) if suspects else None
+        step = max(1, CHUNK_SIZE // len(self.suffixes))
+        for start in range(0, len(bases), step):
+            chunk = bases[start:start + step]
+            if suspects.isdisjoint(chunk):
+                yield self._contextual(chunk)
+            else:
+                out = []
+                previous = 0
+                for index in [index for index, base in enumerate(chunk) if base in suspects]:
+                    out.extend(self._contextual(chunk[previous:index]))
+                    out.extend(candidate for candidate in self._contextual(chunk[index:index + 1])
+                               if not (candidate in seen or seen.add(candidate)))
+                    previous = index + 1
+                out.extend(self._contextual(chunk[previous:]))
+                yield out
+
+    def iter_base(self, word: str) -> Iterator[str]:
+        return chain.from_iterable(map(self._guard, self.iter_base_chunks(word)))
+
+    def iter_contextual(self, word: str) -> Iterator[str]:
+        if not self.suffixes:
+            return iter(())
+        return chain.from_iterable(map(self._contextual, self.iter_base_chunks(word)))
+
+    def iter_candidates(self, word: str) -> Iterator[str]:
+        return chain.from_iterable(self.iter_candidate_chunks(word))
+
+    def _histogram(self, node: RuleNode, lengths: Counter) -> Counter:
+        total = Counter()
+        for child in node.children.values():
+            produced = _length_product(lengths, child.op.histogram)
+            if child.terminal:
+                total.update(produced)
+            total.update(self._histogram(child, produced))
+        return total
+
+    def _value_histogram(self, node: RuleNode, value: str) -> Counter:
+        total = Counter()
+        cased = set()
+        for child in node.children.values():
+            if self._is_repeat(node, child, value, cased):
+                continue
+            if child.dynamic:
+                for result in child.op.apply(value):
+                    if child.terminal:
+                        total[len(result)] += 1
+                    total.update(self._value_histogram(child, result))
+            else:
+                produced = child.op.output_lengths(value)
+                if child.terminal:
+                    total.update(produced)
+                total.update(self._histogram(child, produced))
+        return total
+
+    def length_histogram(self, word: str) -> Counter:
+        """Length histogram of the unguarded base candidates, mostly without building strings."""
+        histogram = self._value_histogram(self.root, word)
+        if self.root.terminal:
+            histogram[len(word)] += 1
+        return histogram
+
+    def count(self, word: str) -> Dict[str, int]:
+        """Exact number of candidates iter_candidates yields, split into base and contextual phases."""
+        histogram = self.length_histogram(word)
+        contextual = _length_product(histogram, _length_histogram(self.suffixes)) if self.suffixes else Counter()
+        return {
+            'base': sum(count for length, count in histogram.items() if length >= self.min_length),
+            'contextual': sum(count for length, count in contextual.items() if length >= self.min_length)
+        }
+
+
+def _resolve(name_or_path: str) -> str:
+    if os.path.isfile(name_or_path):
+        return os.path.abspath(name_or_path)
+    path = os.path.join(RULES_DIR, f"{name_or_path}.rule")
+    if os.path.isfile(path):
+        return path
+    raise ValueError(f"Unknown rule set: {name_or_path}")
+
+
+def _parse_op(token: str, state: dict, where: str) -> RuleOp:
+    sets, tables = state['sets'], state['tables']
+    if token in CASE_OPS:
+        return RuleOp(token, 'case', CASE_OPS[token])
+    match = SET_OP_PATTERN.match(token)
+    if match:
+        if match.group(2) not in sets:
+            raise ValueError(f"{where}: unknown set '{match.group(2)}'")
+        return RuleOp(token, match.group(1), sets[match.group(2)])
+    match = TABLE_OP_PATTERN.match(token)
+    if match:
+        if match.group(2) not in tables:
+            raise ValueError(f"{where}: unknown table '{match.group(2)}'")
+        return RuleOp(token, match.group(1), tables[match.group(2)],
+                      state['max_substitutions'], state['max_variants'])
+    if token[0] in '$^' and len(token) > 1:
+        return RuleOp(token, token[0] + 'lit', token[1:])
+    raise ValueError(f"{where}: unknown rule op '{token}'")
+
+
+def _parse_file(path: str, state: dict, rules: List[List[RuleOp]]):
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = file.read().splitlines()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        where = f"{os.path.basename(path)}:{number}"
+        if not line or line.startswith('#'):
+            continue
+        keyword, _, rest = line.partition(' ')
+        if keyword == 'include':
+            _parse_file(_resolve(rest.strip()), state, rules)
+        elif keyword in ('set', 'table'):
+            name, equals, values = rest.partition('=')
+            if not equals or not name.strip():
+                raise ValueError(f"{where}: expected '{keyword} NAME = ...'")
+            if keyword == 'set':
+                state['sets'][name.strip()] = _expand_values(values.split())
+            else:
+                table = {}
+                for entry in values.split():
+                    key, colon, replacements = entry.partition(':')
+                    if not colon or len(key) != 1:
+                        raise ValueError(f"{where}: bad table entry '{entry}'")
+                    table[key] = replacements.split(',')
+                state['tables'][name.strip()] = table
+        elif keyword == 'suffix':
+            if rest.strip() not in state['sets']:
+                raise ValueError(f"{where}: unknown set '{rest.strip()}'")
+            state['suffix'] = rest.strip()
+        elif keyword in ('guard', 'max_substitutions', 'max_variants'):
+            try:
+                state['min_length' if keyword == 'guard' else keyword] = int(rest)
+            except ValueError:
+                raise ValueError(f"{where}: '{keyword}' expects a number")
+        else:
+            rules.append([_parse_op(token, state, where) for token in line.split()])
+
+
+@lru_cache(maxsize=None)
+def _load(path: str, mtime: float) -> RulePlan:
+    state = {'sets': {}, 'tables': {}, 'suffix': None, 'min_length': 0, 'max_substitutions': 0, 'max_variants': 0}
+    rules = []
+    _parse_file(path, state, rules)
+    suffixes = state['sets'][state['suffix']] if state['suffix'] else []
+    return RulePlan(rules, suffixes, state['min_length'], os.path.splitext(os.path.basename(path))[0])
+
+
+def load_plan(name_or_path: str) -> RulePlan:
+    """Compile a built-in rule set (by name) or a rule file (by path); compiled plans are cached."""
+    path = _resolve(name_or_path)
+    return _load(path, os.path.getmtime(path))
+
+
+def builtin_rule_sets() -> List[str]:
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(RULES_DIR)
+                  if name.endswith('.rule') and name != 'common.rule')
@@ -0,0 +1,275 @@
+import os
+import math
+import sqlite3
+import logging
+import multiprocessing
+import numpy as np
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+from zxcvbn import zxcvbn
+
+PREFILTER_REJECT = -1
+PREFILTER_AMBIGUOUS = 0
+
+# zxcvbn score boundaries in guesses; a string of length n is never rated
+# above 10**n guesses (its brute-force estimate), which gives an exact floor.
+SCORE_GUESS_THRESHOLDS = {0: 0, 1: 1e3, 2: 1e6, 3: 1e8, 4: 1e10}
+
+KNOWN_WORD_SUFFIXES = ['password', 'qwerty', 'pass', 'abc', 'xyz', 'pwd']
+KNOWN_SUFFIXES = KNOWN_WORD_SUFFIXES + [
+    '12345', '1234', '123', '111', '000', '666', '777', '888', '999',
+    '!@#', '$%^', '...', '___', '!', '@', '#', '$', '1', '12',
+]
+SQLITE_BATCH = 500
+
+
+def score_password(password: str) -> int:
+    return zxcvbn(password)['score']
+
+
+def min_length_for_score(score: int) -> int:
+    threshold = SCORE_GUESS_THRESHOLDS[score]
+    return int(math.floor(math.log10(threshold))) + 1 if threshold else 0
+
+
+def _charset_bits(codes: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    lower = (codes >= 97) & (codes <= 122) & mask
+    upper = (codes >= 65) & (codes <= 90) & mask
+    digit = (codes >= 48) & (codes <= 57) & mask
+    other = mask & ~(lower | upper | digit)
+    pool = (26 * lower.any(axis=1) + 26 * upper.any(axis=1)
+            + 10 * digit.any(axis=1) + 33 * other.any(axis=1))
+    return mask.sum(axis=1) * np.log2(np.maximum(pool, 1))
+
+
+def prefilter(passwords: List[str], min_length: int, reject_bits: float) -> np.ndarray:
+    """Classify candidates as plainly weak or ambiguous without running zxcvbn.
+
+    A candidate is plainly weak when it is too short for the target score, or when
+    splitting off a known suffix or a trailing year leaves a low-entropy stem.
+    Nothing is accepted here: dictionary words, keyboard walks and repeats look
+    like high-entropy stems, so only zxcvbn can call a candidate strong.
+    """
+    if not passwords:
+        return np.zeros(0, dtype=np.int8)
+    arr = np.array(passwords, dtype=np.str_)
+    width = arr.itemsize // 4
+    codes = arr.view(np.uint32).reshape(len(arr), width)
+    columns = np.arange(width)
+    lengths = (codes != 0).sum(axis=1)
+
+    weak = (lengths < min_length) | (_charset_bits(codes, codes != 0) < reject_bits)
+    for suffix in KNOWN_SUFFIXES:
+        hit = np.char.endswith(arr, suffix)
+        stem_bits = _charset_bits(codes, columns < (lengths - len(suffix))[:, None])
+        weak |= hit & (stem_bits < reject_bits)
+    if width >= 4:
+        rows = np.arange(len(arr))
+        tail = np.stack([codes[rows, np.maximum(lengths - k, 0)] for k in range(4, 0, -1)], axis=1)
+        year = ((tail - 48) * np.array([1000, 100, 10, 1])).sum(axis=1)
+        is_year = ((tail >= 48) & (tail <= 57)).all(axis=1) & (year >= 1900) & (year <= 2099) & (lengths > 4)
+        stem_bits = _charset_bits(codes, columns < (lengths - 4)[:, None])
+        weak |= is_year & (stem_bits < reject_bits)
+
+    verdicts = np.full(len(arr), PREFILTER_AMBIGUOUS, dtype=np.int8)
+    verdicts[weak] = PREFILTER_REJECT
+    return verdicts
+
+
+class ScoreCache:
+    """Bounded LRU map of password -> zxcvbn score, persisted in SQLite between runs.
+
+    Nothing is read up front: lookups go to the database in batches, new scores
+    and recency updates are buffered and written in one transaction per
+    `flush_every` entries or on save(). Without a path the cache lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 500000, flush_every: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self._pending: Dict[str, int] = {}
+        self._touched: Dict[str, None] = {}
+        self._clock = 0
+        self._db = self._connect(path or ':memory:')
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        try:
+            db = sqlite3.connect(path)
+            db.execute("CREATE TABLE IF NOT EXISTS scores (password TEXT PRIMARY KEY, score INTEGER NOT NULL, "
+                       "used INTEGER NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS scores_used ON scores (used)")
+            self._clock = db.execute("SELECT COALESCE(MAX(used), 0) FROM scores").fetchone()[0]
+            return db
+        except sqlite3.Error as e:
+            if path == ':memory:':
+                raise
+            logging.error(f"Error opening score cache {path}: {e}; using an in-memory cache")
+            self.path = None
+            return self._connect(':memory:')
+
+    def __len__(self) -> int:
+        self.save()
+        return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def get_many(self, passwords: List[str]) -> List[Optional[int]]:
+        found = {}
+        wanted = [password for password in dict.fromkeys(passwords) if password not in self._pending]
+        for start in range(0, len(wanted), SQLITE_BATCH):
+            chunk = wanted[start:start + SQLITE_BATCH]
+            query = f"SELECT password, score FROM scores WHERE password IN ({','.join('?' * len(chunk))})"
+            found.update(self._db.execute(query, chunk).fetchall())
+        self._touched.update(dict.fromkeys(found))
+        return [self._pending.get(password, found.get(password)) for password in passwords]
+
+    def get(self, password: str) -> Optional[int]:
+        return self.get_many([password])[0]
+
+    def put(self, password: str, score: int):
+        self._pending[password] = score
+        if len(self._pending) + len(self._touched) >= self.flush_every:
+            self.save()
+
+    def save(self):
+        if not self._pending and not self._touched:
+            return
+        try:
+            with self._db:
+                self._db.executemany("UPDATE scores SET used = ? WHERE password = ?",
+                                     ((self._tick(), password) for password in self._touched))
+                self._db.executemany("INSERT OR REPLACE INTO scores (password, score, used) VALUES (?, ?, ?)",
+                                     ((password, score, self._tick()) for password, score in self._pending.items()))
+                excess = self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._db.execute("DELETE FROM scores WHERE password IN "
+                                     "(SELECT password FROM scores ORDER BY used LIMIT ?)", (excess,))
+        except sqlite3.Error as e:
+            logging.error(f"Error saving score cache {self.path}: {e}")
+        self._pending.clear()
+        self._touched.clear()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def close(self):
+        if self._db is None:
+            return
+        self.save()
+        self._db.close()
+        self._db = None
+
+
+class StrengthScorer:
+    def __init__(self, min_score: int = 3, workers: Optional[int] = None,
+                 cache_path: Optional[str] = None, cache_size: int = 500000,
+                 batch_size: int = 2048, use_prefilter: bool = True,
+                 reject_bits: float = 22.0):
+        self.min_score = min_score
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.parallel_threshold = 256
+        self.cache = ScoreCache(cache_path, cache_size)
+        self.use_prefilter = use_prefilter
+        self.reject_bits = reject_bits
+        self.tier_counts = {'prefilter_rejected': 0, 'cache': 0, 'zxcvbn': 0}
+        self.budget_cut = 0
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn rather than fork: the parent may hold TensorFlow state or run in a Qt thread
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _compute(self, passwords: List[str]) -> List[int]:
+        if self.workers <= 1 or len(passwords) < self.parallel_threshold:
+            return [score_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._get_pool().map(score_password, passwords, chunksize=chunksize))
+
+    def score_batch(self, passwords: List[str]) -> List[int]:
+        scores = self.cache.get_many(passwords)
+        missing = list(dict.fromkeys(pwd for pwd, score in zip(passwords, scores) if score is None))
+        self.tier_counts['cache'] += len(passwords) - len(missing)
+        self.tier_counts['zxcvbn'] += len(missing)
+        if missing:
+            computed = dict(zip(missing, self._compute(missing)))
+            for password, score in computed.items():
+                self.cache.put(password, score)
+            scores = [computed[pwd] if score is None else score for pwd, score in zip(passwords, scores)]
+        return scores
+
+    def is_strong(self, password: str) -> bool:
+        return self.score_batch([password])[0] >= self.min_score
+
+    def _score_strong(self, candidates: List[str], needed: Optional[int]) -> List[str]:
+        """Strong candidates, scoring in sub-batches that stop once `needed` are found.
+
+        A sub-batch is sized by the pass rate seen so far and at most doubles, so
+        the last one overshoots `needed` by little. Candidates left unscored once
+        `needed` is reached count towards budget_cut.
+        """
+        if needed is None:
+            return [pwd for pwd, score in zip(candidates, self.score_batch(candidates)) if score >= self.min_score]
+        strong = []
+        start = size = 0
+        while start < len(candidates) and len(strong) < needed:
+            pass_rate = (len(strong) + 1) / (start + 1)
+            size = min(max(size * 2, 1), max(1, int((needed - len(strong)) / pass_rate) + 1))
+            chunk = candidates[start:start + size]
+            start += len(chunk)
+            strong.extend(pwd for pwd, score in zip(chunk, self.score_batch(chunk)) if score >= self.min_score)
+        self.budget_cut += len(candidates) - start
+        return strong
+
+    def _filter_batch(self, batch: List[str], needed: Optional[int] = None) -> List[str]:
+        if not self.use_prefilter:
+            return self._score_strong(batch, needed)
+        verdicts = prefilter(batch, min_length_for_score(self.min_score), self.reject_bits)
+        self.tier_counts['prefilter_rejected'] += int((verdicts == PREFILTER_REJECT).sum())
+        ambiguous = [pwd for pwd, verdict in zip(batch, verdicts) if verdict == PREFILTER_AMBIGUOUS]
+        return self._score_strong(ambiguous, needed)
+
+    def iter_strong(self, passwords: Iterable[str], limit: Optional[int] = None) -> Iterator[str]:
+        """Yield strong passwords batch by batch, stopping once `limit` have been found.
+
+        With a limit, batches start at what the limit needs and at most double, and
+        are cut to what the observed pass rate says is still needed, so a small
+        --max never pulls a full batch from upstream stages. Within a batch,
+        candidates are scored in sub-batches that stop at the limit. Strong ones of
+        the last sub-batch beyond it, and those left unscored, are counted in
+        budget_cut rather than yielded.
+        """
+        passwords = iter(passwords)
+        emitted = seen = passed = size = 0
+        while limit is None or emitted < limit:
+            if limit is None:
+                size = self.batch_size
+            else:
+                pass_rate = (passed + 1) / (seen + 1)
+                size = min(self.batch_size, max(size * 2, 32), max(32, int((limit - emitted) / pass_rate) + 1))
+            batch = list(islice(passwords, size))
+            if not batch:
+                break
+            strong = self._filter_batch(batch, None if limit is None else limit - emitted)
+            seen += len(batch)
+            passed += len(strong)
+            if limit is not None and len(strong) > limit - emitted:
+                self.budget_cut += len(strong) - (limit - emitted)
+                strong = strong[:limit - emitted]
+            emitted += len(strong)
+            yield from strong
+
+    def filter_strong(self, passwords: List[str]) -> List[str]:
+        return list(self.iter_strong(passwords))
+
+    def tier_report(self) -> Dict[str, int]:
+        return dict(self.tier_counts)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.cache.close()
@@ -18,6 +18,7 @@ TRANSLATIONS = {
         'output_file_label': 'Output File:',
         'sync': 'Sync Datasets',
         'verbose': 'Verbose Logging',
+        'method_stats': 'Show Per-Method Yield Statistics',
         'error_title': 'Error',
         'error_message': 'An error occurred:',
         'help_text': '''
@@ -43,7 +44,22 @@ TRANSLATIONS = {
         },
         'pattern_label': 'Custom Pattern:',
         'pattern_placeholder': 'Example: [word][number][symbol] or [name]123!',
-        'min_length': 'Minimum Length:'
+        'min_length': 'Minimum Length:',
+        'cancel_button': 'Cancel',
+        'stage_sync': 'Syncing datasets...',
+        'stage_load': 'Loading datasets...',
+        'stage_model': 'Loading/training ML model...',
+        'stage_estimate': 'Estimating password list size...',
+        'stage_generate': 'Generating, scoring and saving passwords...',
+        'progress_detail': 'expanded {expanded:,} | unique {unique:,} | strong {strong:,} of {total:,}',
+        'cancelling': 'Cancelling...',
+        'generation_cancelled': 'Generation cancelled. The output file may contain a partial list.',
+        'preview_label': 'Preview:',
+        'preview_filter': 'Filter (contains)',
+        'preview_search': 'Search',
+        'find_next': 'Find Next',
+        'preview_status': '{rows:,} rows loaded | {lines:,} lines indexed',
+        'preview_not_found': 'No match for "{text}"'
     },
     'fa': {
         'title': 'دیکشنری V7lthronyx نسخه ۱.۵ بتا - تولید رمز عبور',
@@ -64,6 +80,7 @@ TRANSLATIONS = {
         'output_file_label': 'فایل خروجی:',
         'sync': 'همگام‌سازی دیتاست‌ها',
         'verbose': 'ورود با جزئیات کامل',
+        'method_stats': 'نمایش آمار بازده هر روش',
         'error_title': 'خطا',
         'error_message': 'خطایی رخ داده است:',
         'help_text': '''
@@ -89,6 +106,21 @@ TRANSLATIONS = {
         },
         'pattern_label': 'الگوی سفارشی:',
         'pattern_placeholder': 'مثال: [کلمه][عدد][نماد] یا [نام]123!',
-        'min_length': 'حداقل طول:'
+        'min_length': 'حداقل طول:',
+        'cancel_button': 'لغو',
+        'stage_sync': 'در حال همگام‌سازی دیتاست‌ها...',
+        'stage_load': 'در حال بارگذاری دیتاست‌ها...',
+        'stage_model': 'در حال بارگذاری/آموزش مدل یادگیری ماشین...',
+        'stage_estimate': 'در حال تخمین اندازه لیست رمز عبور...',
+        'stage_generate': 'در حال تولید، سنجش و ذخیره رمزهای عبور...',
+        'progress_detail': 'گسترش یافته {expanded:,} | یکتا {unique:,} | قوی {strong:,} از {total:,}',
+        'cancelling': 'در حال لغو...',
+        'generation_cancelled': 'تولید لغو شد. ممکن است فایل خروجی شامل بخشی از لیست باشد.',
+        'preview_label': 'پیش‌نمایش:',
+        'preview_filter': 'فیلتر (شامل)',
+        'preview_search': 'جستجو',
+        'find_next': 'یافتن بعدی',
+        'preview_status': '{rows:,} ردیف بارگذاری شده | {lines:,} خط نمایه شده',
+        'preview_not_found': 'موردی برای "{text}" یافت نشد'
     }
 }
@@ -0,0 +1,136 @@
+import os
+import bz2
+import sys
+import gzip
+import lzma
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+CODEC_EXTENSIONS = {'none': '', 'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+DEFAULT_LEVELS = {'gzip': 6, 'bz2': 9, 'xz': 6}
+BLOCK_SIZE = 1 << 20
+STREAM_FLUSH_INTERVAL = 0.05
+
+
+def compressor(codec: str, level: Optional[int] = None) -> Optional[Callable[[bytes], bytes]]:
+    """Return a function compressing one block into a self-contained stream of `codec`.
+
+    Concatenated gzip members, bz2 streams and xz streams are valid files for the
+    standard tools, so blocks can be compressed independently and in parallel.
+    """
+    if codec not in CODEC_EXTENSIONS:
+        raise ValueError(f"Unknown codec: {codec}")
+    if codec == 'none':
+        return None
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'gzip':
+        return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    if codec == 'bz2':
+        return lambda data: bz2.compress(data, compresslevel=level)
+    return lambda data: lzma.compress(data, preset=level)
+
+
+def output_path(file_name: str, codec: str) -> str:
+    return file_name if file_name == '-' else file_name + CODEC_EXTENSIONS[codec]
+
+
+class BlockWriter:
+    """Write lines in large blocks, compressing blocks on a thread pool and writing them in order.
+
+    zlib, bz2 and lzma release the GIL while compressing, so blocks really are
+    compressed in parallel. A file name of '-' streams to the process's stdout:
+    partial blocks are flushed every `flush_interval` seconds so a consumer sees
+    candidates as they are produced, blocking writes give backpressure, and a
+    consumer closing the pipe raises BrokenPipeError with stdout redirected to
+    /dev/null so the interpreter can exit quietly.
+    """
+
+    def __init__(self, file_name: str, codec: str = 'none', level: Optional[int] = None,
+                 threads: Optional[int] = None, block_size: int = BLOCK_SIZE,
+                 flush_interval: Optional[float] = None):
+        self.path = output_path(file_name, codec)
+        self.compress = compressor(codec, level)
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+        self.stream = self.path == '-'
+        self.flush_interval = STREAM_FLUSH_INTERVAL if self.stream and flush_interval is None else flush_interval
+        self.written = 0
+        self.broken = False
+        self._file = sys.__stdout__.buffer if self.stream else open(self.path, 'wb')
+        self._pool = ThreadPoolExecutor(max_workers=self.threads) if self.compress and self.threads > 1 else None
+        self._pending = deque()
+
+    def _broken_pipe(self):
+        self.broken = True
+        if self.stream:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, self._file.fileno())
+            os.close(devnull)
+
+    def _emit(self, data: bytes, count: int):
+        try:
+            self._file.write(data)
+        except BrokenPipeError:
+            self._broken_pipe()
+            raise
+        self.written += count
+
+    def _write_block(self, lines):
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        if self._pool is not None:
+            self._pending.append((self._pool.submit(self.compress, data), len(lines)))
+            while len(self._pending) > self.threads * 2:
+                future, count = self._pending.popleft()
+                self._emit(future.result(), count)
+        else:
+            self._emit(self.compress(data) if self.compress else data, len(lines))
+
+    def write_lines(self, lines: Iterable[str]) -> int:
+        """Write every line of `lines`; returns how many reached the output."""
+        size = 0
+        block = []
+        last_flush = time.monotonic()
+        for line in lines:
+            block.append(line)
+            size += len(line) + 1
+            if size >= self.block_size:
+                self._write_block(block)
+                block, size = [], 0
+            if self.flush_interval is not None and time.monotonic() - last_flush >= self.flush_interval:
+                if block:
+                    self._write_block(block)
+                    block, size = [], 0
+                self.flush()
+                last_flush = time.monotonic()
+        if block:
+            self._write_block(block)
+        self.flush()
+        return self.written
+
+    def flush(self):
+        while self._pending:
+            future, count = self._pending.popleft()
+            self._emit(future.result(), count)
+        try:
+            self._file.flush()
+        except BrokenPipeError:
+            self._broken_pipe()
+            raise
+
+    def close(self):
+        try:
+            if not self.broken:
+                self.flush()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+            if not self.stream:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()